@@ -16,12 +16,23 @@ and Sophia Huynh.
 
 === Module Description ===
 This module contains all of the classes necessary for a1_game.py to run.
+
+GameBoard gets the storage of its tile codes from a1_grid.TileGrid, its
+snapshots and recordings from a1_history.RecordingBoard, and its whole-board
+queries from a1_index.IndexedBoard.
 """
 
 from __future__ import annotations
 
-from random import shuffle
-from typing import List, Tuple, Optional, Union
+import gc
+from random import Random, shuffle
+from typing import (AnyStr, Callable, Dict, Iterable, List, Tuple, Optional,
+                    Union)
+
+from a1_grid import OCCUPIED, TileGrid, read_grid
+from a1_history import BoardHistory, RecordingBoard
+from a1_index import BoardIndexes, IndexedBoard
+from a1_profile import TickProfiler
 
 # Each raccoon moves every this many turns
 RACCOON_TURN_FREQUENCY = 20
@@ -34,17 +45,27 @@ RIGHT = (1, 0)
 DIRECTIONS = [LEFT, UP, RIGHT, DOWN]
 
 
-def get_shuffled_directions() -> List[Tuple[int, int]]:
+def get_shuffled_directions(rng: Optional[Random] = None) \
+        -> List[Tuple[int, int]]:
     """
     Provided helper that returns a shuffled copy of DIRECTIONS.
     You should use this where appropriate
+
+    The copy is shuffled with <rng>, or with the module-level generator of
+    the random module if <rng> is None.
+
+    >>> sorted(get_shuffled_directions(Random(148))) == sorted(DIRECTIONS)
+    True
     """
     to_return = DIRECTIONS[:]
-    shuffle(to_return)
+    if rng is None:
+        shuffle(to_return)
+    else:
+        rng.shuffle(to_return)
     return to_return
 
 
-class GameBoard:
+class GameBoard(TileGrid, RecordingBoard, IndexedBoard):
     """A game board on which the game is played.
 
     === Public Attributes ===
@@ -56,6 +77,9 @@ class GameBoard:
         the number of squares wide this board is
     height:
         the number of squares high this board is
+    rng:
+        the random generator that this board's raccoons draw their moves
+        from, and that characters are placed with by a1_sim.populate_board
 
 
     === Representation Invariants ===
@@ -70,34 +94,29 @@ class GameBoard:
     """
     # === Private Attributes ===
     # _player: the player of the game
-    # _c_garbage: a closed garbage bin
-    # _o_garbage: an open garbage bin
-    # _raccoon: a raccoon that moves randomly
-    # _raccoon_in: a raccoon in a garbage bin
-    # _smart: a smart raccoon that moves intelligently
-    # _smart_in: a smart raccoon in a garbage bin
-    # _recycling: a recycling bin
     # _list_of_char: a list of the characters in the game
+    # _tiles: a mapping from (x, y) coordinates to the list of characters on
+    #   that tile, kept up to date as characters are placed and move
+    # _profiler: collects timings of give_turns, or None if profiling is off
 
     ended: bool
     turns: int
     width: int
     height: int
+    rng: Random
     _player: Optional[Player]
-    _c_garbage: Optional[GarbageCan]
-    _o_garbage: Optional[GarbageCan]
-    _raccoon: Optional[Raccoon]
-    _raccoon_in: Optional[Raccoon]
-    _smart: Optional[SmartRaccoon]
-    _smart_in: Optional[Raccoon]
-    _recycling: Optional[RecyclingBin]
     _list_of_char: List[Union[Player, GarbageCan, Raccoon, RecyclingBin]]
+    _tiles: Dict[Tuple[int, int], List[Character]]
+    _profiler: Optional[TickProfiler]
 
-    def __init__(self, w: int, h: int) -> None:
+    def __init__(self, w: int, h: int, rng: Optional[Random] = None) -> None:
         """Initialize this Board to be of the given width <w> and height <h> in
         squares. A board is initially empty (no characters) and no turns have
         been taken.
 
+        Randomness is drawn from <rng>, or from a new random generator of its
+        own if <rng> is None, so that boards do not disturb each other.
+
         >>> b = GameBoard(3, 3)
         >>> b.width == 3
         True
@@ -114,16 +133,15 @@ class GameBoard:
 
         self.width = w
         self.height = h
+        self.rng = Random() if rng is None else rng
 
         self._player = None
-        self._c_garbage = None
-        self._o_garbage = None
-        self._recycling = None
-        self._raccoon = None
-        self._smart = None
-        self._raccoon_in = None
-        self._smart_in = None
         self._list_of_char = []
+        self._tiles = {}
+        self._grid = self._new_grid()
+        self._indexes = BoardIndexes()
+        self._profiler = None
+        self._history = BoardHistory()
 
     def place_character(self, c: Character) -> None:
         """Record that character <c> is on this board.
@@ -150,21 +168,73 @@ class GameBoard:
         """
         if isinstance(c, Player):
             self._player = c
-        elif isinstance(c, SmartRaccoon):
-            if c.inside_can:
-                self._smart_in = c
-            self._smart = c
-        elif isinstance(c, Raccoon):
-            if c.inside_can:
-                self._raccoon_in = c
-            self._raccoon = c
-        elif isinstance(c, GarbageCan):
-            if c.locked:
-                self._c_garbage = c
-            self._o_garbage = c
-        elif isinstance(c, RecyclingBin):
-            self._recycling = c
         self._list_of_char.append(c)
+        tile = self._tiles.setdefault((c.x, c.y), [])
+        tile.append(c)
+        if isinstance(c, Raccoon) and len(tile) > 1:
+            c.inside_can = True  # placed directly inside an open GarbageCan
+        self.update_tile(c.x, c.y)
+
+    def update_position(self, c: Character, old_x: int, old_y: int) -> None:
+        """Record that character <c> has moved from tile (<old_x>, <old_y>)
+        to tile (c.x, c.y).
+
+        This method should only be called from the Character x and y setters.
+
+        Preconditions:
+        - Character <c> has already been placed on this board at
+        (<old_x>, <old_y>).
+
+        >>> b = GameBoard(3, 2)
+        >>> r = Raccoon(b, 1, 1)
+        >>> r.x = 2  # the x setter calls update_position
+        >>> b.at(1, 1)
+        []
+        >>> b.at(2, 1) == [r]
+        True
+        """
+        old_tile = self._tiles[(old_x, old_y)]
+        old_tile.remove(c)
+        if not old_tile:
+            del self._tiles[(old_x, old_y)]
+        self._tiles.setdefault((c.x, c.y), []).append(c)
+        # the new tile first, so that a pushed bin joins the bins around it
+        # before it leaves its cluster, which then only splits if it must
+        self.update_tile(c.x, c.y)
+        self.update_tile(old_x, old_y)
+
+    def update_tile(self, x: int, y: int) -> None:
+        """Recompute the tile code stored for tile (<x>, <y>) from the
+        characters currently on it. Tiles that are not on the board are
+        ignored.
+
+        This method should only be called by this board and by Characters whose
+        state (e.g. locked or inside_can) changes what their tile looks like.
+
+        >>> b = GameBoard(2, 1)
+        >>> g = GarbageCan(b, 1, 0, False)
+        >>> b.tile_at(1, 0)
+        'O'
+        >>> g.locked = True  # the locked setter calls update_tile
+        >>> b.tile_at(1, 0)
+        'C'
+        """
+        if self.on_board(x, y):
+            code = self._tile_code(x, y)
+            self._indexes.update(x, y, self.tile_at(x, y), code)
+            self._write_tile(x, y, code)
+
+    def _tile_code(self, x: int, y: int) -> str:
+        """Return the tile code of tile (<x>, <y>), worked out from the
+        characters on it.
+        """
+        chars = self._tiles.get((x, y))
+        if not chars:
+            return '-'
+        elif len(chars) > 1:
+            return '@'
+        else:
+            return chars[0].get_char()
 
     def at(self, x: int, y: int) -> List[Character]:
         """Return the characters at tile (x, y).
@@ -187,11 +257,9 @@ class GameBoard:
         >>> b.at(0, 1)[0] == p
         True
         """
-        char_at_tile = []
-        for i in self._list_of_char:
-            if i.x == x and i.y == y:
-                char_at_tile.append(i)
-        return char_at_tile
+        if self._profiler is not None:
+            self._profiler.count('at')
+        return list(self._tiles.get((x, y), []))
 
     def to_grid(self) -> List[List[chr]]:
         """
@@ -215,18 +283,21 @@ class GameBoard:
         >>> b.to_grid()
         [['P', '-', '-'], ['-', 'R', 'C']]
         """
-        grid_board = []
-        for y in range(self.height):
-            grid = []
-            for x in range(self.width):
-                if len(self.at(x, y)) <= 1 and not self.at(x, y):
-                    grid.append('-')
-                elif len(self.at(x, y)) <= 1 and self.at(x, y):
-                    grid.append(self.char_type(x, y))
-                else:
-                    grid.append('@')
-            grid_board.append(grid)
-        return grid_board
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [row[:] for row in self._grid]
+
+    def turn_order(self) -> List[Raccoon]:
+        """Return the raccoons (including SmartRaccoons) on this board, in
+        the order in which give_turns gives them their turns.
+
+        >>> b = GameBoard(3, 1)
+        >>> r = Raccoon(b, 2, 0)
+        >>> s = SmartRaccoon(b, 0, 0)
+        >>> b.turn_order() == [r, s]
+        True
+        """
+        return [c for c in self._list_of_char if isinstance(c, Raccoon)]
 
     def char_type(self, x: int, y: int) -> str:
         """
@@ -241,27 +312,7 @@ class GameBoard:
         >>> b.char_type(1, 1)
         'R'
         """
-        character = ''
-        if isinstance(self.at(x, y)[0], Player):
-            character = self._player.get_char()
-        elif isinstance(self.at(x, y)[0], SmartRaccoon):
-            if self.at(x, y)[0].inside_can:
-                character = '@'
-            else:
-                character = 'S'
-        elif isinstance(self.at(x, y)[0], Raccoon):
-            if self.at(x, y)[0].inside_can:
-                character = '@'
-            else:
-                character = 'R'
-        elif isinstance(self.at(x, y)[0], GarbageCan):
-            if self.at(x, y)[0].locked:
-                character = 'C'
-            else:
-                character = 'O'
-        elif isinstance(self.at(x, y)[0], RecyclingBin):
-            character = self._recycling.get_char()
-        return character
+        return self._tiles[(x, y)][0].get_char()
 
     def __str__(self) -> str:
         """
@@ -282,21 +333,15 @@ class GameBoard:
         >>> str(b)
         'P--\\n-RO'
         """
-        board = self.to_grid()
-        board_str = ''
-        for i in range(len(board)):
-            for y in board[i]:
-                board_str += y
-            if i < len(board) - 1:
-                board_str += '\n'
-        return board_str
+        return '\n'.join(self.iter_rows())
 
-    def setup_from_grid(self, grid: str) -> None:
+    def setup_from_grid(self, grid: Union[str, Iterable[AnyStr]]) -> None:
         """
         Set the state of this GameBoard to correspond to the string <grid>,
         which represents a game board using the following chars:
 
         'R' = Raccoon not in a GarbageCan
+        'S' = SmartRaccoon not in a GarbageCan
         'P' = Player
         'C' = closed GarbageCan
         'O' = open GarbageCan
@@ -306,39 +351,91 @@ class GameBoard:
 
         There is a newline character between each board row.
 
+        <grid> may also be an iterable of rows (str or bytes, with or without
+        a trailing newline), such as a file opened for reading, so that a
+        level can be loaded without first reading it into one string.
+
+        The grid is checked and its tile codes are stored by a few passes
+        over its bytes that run in C, and the characters are then created in
+        bulk (see _load_characters), skipping the empty tiles.
+
+        Rows that are shorter than the first row are padded with empty
+        tiles, and one newline at the end of <grid> is ignored.
+
+        Raise ValueError if a row is longer than the first row or a tile code
+        is not one of the above.
+
         >>> b = GameBoard(4, 4)
         >>> b.setup_from_grid('P-B-\\n-BRB\\n--BB\\n-C--')
         >>> str(b)
         'P-B-\\n-BRB\\n--BB\\n-C--'
-        """
-        lines = grid.split("\n")
-        width = len(lines[0])
-        height = len(lines)
-        self.__init__(width, height)  # reset the board to an empty board
-        y = 0
-        for line in lines:
-            x = 0
-            for char in line:
-                if char == 'R':
-                    Raccoon(self, x, y)
-                elif char == 'S':
-                    SmartRaccoon(self, x, y)
-                elif char == 'P':
-                    Player(self, x, y)
-                elif char == 'O':
-                    GarbageCan(self, x, y, False)
-                elif char == 'C':
-                    GarbageCan(self, x, y, True)
-                elif char == 'B':
-                    RecyclingBin(self, x, y)
-                elif char == '@':
-                    GarbageCan(self, x, y, False)
-                    Raccoon(self, x, y)  # always makes it a Raccoon
-                    # Note: the order mattered above, as we have to place the
-                    # Raccoon BEFORE the GarbageCan (see the place_character
-                    # method precondition)
-                x += 1
-            y += 1
+        >>> b.setup_from_grid(['-@\\n', 'SO\\n'])
+        >>> b.to_grid()
+        [['-', '@'], ['S', 'O']]
+        >>> b.setup_from_grid('P-\\n-')
+        >>> str(b)
+        'P-\\n--'
+        >>> b.setup_from_grid('P-\\n-RR')
+        Traceback (most recent call last):
+        ...
+        ValueError: a row of the grid is longer than its first row
+        """
+        width, height, tiles = read_grid(grid)
+        profiler = self._profiler
+        # reset the board to an empty board that keeps its random generator
+        self.__init__(width, height, self.rng)
+        self._profiler = profiler
+        self._load_tiles(tiles)
+        # creating many objects at once would otherwise set off many garbage
+        # collections, each of which looks at every object on the board
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self._load_characters(tiles)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _load_characters(self, tiles: bytes) -> None:
+        """Create the characters of this empty board from <tiles>, its tile
+        codes in the format of _tile_bytes, which are already stored.
+
+        The result is the same as creating the characters one at a time, row
+        by row, with an '@' tile's GarbageCan created before its Raccoon. But
+        since their tile codes are already stored, the characters are not
+        placed with place_character, which would store each of them again;
+        they are added to this board's character list and tiles as they are
+        created, in one pass over the occupied tiles of each row.
+        """
+        width = self.width
+        chars = self._list_of_char
+        tiles_of = self._tiles
+        occupied = OCCUPIED.finditer
+        for y in range(self.height):
+            start = y * width
+            for match in occupied(tiles, start, start + width):
+                x = match.start() - start
+                code = match[0]
+                if code == b'B':
+                    c = RecyclingBin(self, x, y, False)
+                elif code == b'R':
+                    c = Raccoon(self, x, y, False)
+                elif code == b'S':
+                    c = SmartRaccoon(self, x, y, False)
+                elif code == b'P':
+                    c = self._player = Player(self, x, y, False)
+                elif code == b'@':
+                    c = GarbageCan(self, x, y, False, False)
+                    r = Raccoon(self, x, y, False)
+                    chars.append(c)
+                    chars.append(r)
+                    tiles_of[x, y] = [c, r]
+                    r.inside_can = True
+                    continue
+                else:
+                    c = GarbageCan(self, x, y, code == b'C', False)
+                chars.append(c)
+                tiles_of[x, y] = [c]
 
     # a helper method you may find useful in places
     def on_board(self, x: int, y: int) -> bool:
@@ -381,15 +478,54 @@ class GameBoard:
         >>> (p.x, p.y) == (1, 0)  # Player moved right!
         True
         """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.begin_tick()
         self._player.take_turn()
+        if profiler is not None:
+            profiler.lap('player')
         self.turns += 1  # PROVIDED, DO NOT CHANGE
 
         if self.turns % RACCOON_TURN_FREQUENCY == 0:  # PROVIDED, DO NOT CHANGE
             for i in self._list_of_char:
                 if isinstance(i, (Raccoon, SmartRaccoon)):
                     i.take_turn()
+            if profiler is not None:
+                profiler.lap('raccoons')
 
         self.check_game_end()  # PROVIDED, DO NOT CHANGE
+        self._history.end_tick()
+        if profiler is not None:
+            profiler.lap('game_end')
+            profiler.end_tick(self.turns)
+
+    def enable_profiling(self, callback: Optional[
+            Callable[[Dict[str, object]], None]] = None) -> TickProfiler:
+        """Start profiling every call to give_turns on this board, and return
+        the TickProfiler that collects the results. Its snapshot method gives
+        the totals so far.
+
+        If <callback> is not None, it is called at the end of every tick with
+        a record of that tick: a dict with the board's 'turn', the wall 'time'
+        of each phase that ran, and the number of 'calls' to at and to_grid.
+
+        When profiling is disabled (the default), give_turns, at and to_grid
+        only pay for one check of a private attribute.
+
+        >>> b = GameBoard(3, 1)
+        >>> b.setup_from_grid('P--')
+        >>> profiler = b.enable_profiling()
+        >>> for _ in range(RACCOON_TURN_FREQUENCY):
+        ...     b.give_turns()
+        >>> profiler.phase_calls
+        {'player': 20, 'raccoons': 1, 'game_end': 20}
+        """
+        self._profiler = TickProfiler(callback)
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        """Stop profiling give_turns on this board."""
+        self._profiler = None
 
     def handle_event(self, event: Tuple[int, int]) -> None:
         """Handle a user-input event.
@@ -398,100 +534,7 @@ class GameBoard:
         Player gets a turn, it can make the move that the user input indicated.
         """
         self._player.record_event(event)
-
-    def check_game_end(self) -> Optional[int]:
-        """Check if this game has ended. A game ends when all the raccoons on
-        this game board are either inside a can or trapped.
-
-        If the game has ended:
-        - update the ended attribute to be True
-        - Return the score, where the score is given by:
-            (number of raccoons trapped) * 10 + the adjacent_bin_score
-        If the game has not ended:
-        - update the ended attribute to be False
-        - return None
-
-        >>> b = GameBoard(3, 2)
-        >>> _ = Raccoon(b, 1, 0)
-        >>> _ = Player(b, 0, 0)
-        >>> _ = RecyclingBin(b, 1, 1)
-        >>> b.check_game_end() is None
-        True
-        >>> b.ended
-        False
-        >>> _ = RecyclingBin(b, 2, 0)
-        >>> b.check_game_end()
-        11
-        >>> b.ended
-        True
-        """
-        raccoons = 0
-        trapped = 0
-        inside = 0
-        for i in self._list_of_char:
-            if isinstance(i, Raccoon):
-                raccoons += 1
-                if i.check_trapped():
-                    trapped += 1
-                elif i.inside_can:
-                    inside += 1
-        if trapped + inside == raccoons:
-            self.ended = True
-            return trapped * 10 + self.adjacent_bin_score()
-        else:
-            return None
-
-    def adjacent_bin_score(self) -> int:
-        """
-        Return the size of the largest cluster of adjacent recycling bins
-        on this board.
-
-        Two recycling bins are adjacent when they are directly beside each other
-        in one of the four directions (up, down, left, right).
-
-        See Task #5 in the handout for ideas if you aren't sure how
-        to approach this problem.
-
-        >>> b = GameBoard(3, 3)
-        >>> _ = RecyclingBin(b, 1, 1)
-        >>> _ = RecyclingBin(b, 0, 0)
-        >>> _ = RecyclingBin(b, 2, 2)
-        >>> print(b)
-        B--
-        -B-
-        --B
-        >>> b.adjacent_bin_score()
-        1
-        >>> _ = RecyclingBin(b, 2, 1)
-        >>> print(b)
-        B--
-        -BB
-        --B
-        >>> b.adjacent_bin_score()
-        3
-        >>> _ = RecyclingBin(b, 0, 1)
-        >>> print(b)
-        B--
-        BBB
-        --B
-        >>> b.adjacent_bin_score()
-        5
-        """
-        row = []
-        col = []
-        checked = []
-        longest_chain = 1
-        for y in range(len(self.to_grid())):
-            for x in range(len(self.to_grid()[y])):
-                if self.to_grid()[y][x] == 'B':
-                    col.append(x)
-                    row.append(y)
-        for i in range(len(col)):
-            beside = get_neighbours((col[i], row[i]))
-            chain = self.check_adjacent(beside, checked)
-            if chain[0] > longest_chain:
-                longest_chain = chain[0] - 1
-        return longest_chain
+        self._history.record_event(DIRECTIONS.index(event) + 1)
 
     def check_adjacent(self, beside: List[Tuple[int, int]],
                        checked: List[Tuple[int, int]])\
@@ -500,6 +543,10 @@ class GameBoard:
         coordinates in beside containing a recycling bin on a GameBoard
         and a list of recycling bins that have already been checked.
 
+        Bins are visited depth first, in the same order as a recursive search
+        would visit them, but with an explicit stack so that large clusters
+        cannot exceed the recursion limit.
+
         NOTE: the minimum is always 1 since the point is a recycling bin itself.
 
         >>> b = GameBoard(3, 3)
@@ -510,14 +557,19 @@ class GameBoard:
         (4, [(0, 0), (1, 1), (2, 2)])
         """
         chain = 1
-        for j in beside:
-            if self.on_board(j[0], j[1]) and\
-                    self.to_grid()[j[1]][j[0]] == 'B' and \
-                    (j[0], j[1]) not in checked:
-                chain += 1
-                checked.append((j[0], j[1]))
-                neighbours = get_neighbours((j[0], j[1]))
-                chain += self.check_adjacent(neighbours, checked)[0] - 1
+        seen = set(checked)
+        stack = [iter(beside)]
+        while stack:
+            for j in stack[-1]:
+                if j not in seen and self.on_board(j[0], j[1]) and \
+                        self.tile_at(j[0], j[1]) == 'B':
+                    chain += 1
+                    seen.add(j)
+                    checked.append(j)
+                    stack.append(iter(get_neighbours(j)))
+                    break
+            else:
+                stack.pop()
         return chain, checked
 
 
@@ -541,21 +593,59 @@ class Character:
     === Representation Invariants ===
     x, y are valid coordinates in board (i.e. board.on_board(x, y) is True)
     """
+    # === Private Attributes ===
+    # _x, _y:
+    #   the coordinates of this Character. They are exposed through the x and
+    #   y properties, so that every move is reported to the board's tile index.
     board: GameBoard
-    x: int
-    y: int
+    _x: int
+    _y: int
+
+    # Characters have no per-instance __dict__, since boards may hold many
+    # thousands of them
+    __slots__ = ('board', '_x', '_y')
 
-    def __init__(self, b: GameBoard, x: int, y: int) -> None:
+    def __init__(self, b: GameBoard, x: int, y: int,
+                 place: bool = True) -> None:
         """Initialize this Character with board <b>, and
         at tile (<x>, <y>).
 
         When a Character is initialized, it is placed on board <b>
         by calling the board's place_character method. Refer to the
         preconditions of place_character, which must be satisfied.
+
+        If <place> is False, the Character is not placed, and the board
+        records it itself (see GameBoard.setup_from_grid).
         """
         self.board = b
-        self.x, self.y = x, y
-        self.board.place_character(self)  # this associates self with the board!
+        self._x, self._y = x, y
+        if place:
+            # this associates self with the board!
+            self.board.place_character(self)
+
+    @property
+    def x(self) -> int:
+        """The x coordinate of this Character."""
+        return self._x
+
+    @x.setter
+    def x(self, value: int) -> None:
+        old_x = self._x
+        self._x = value
+        self.board.record_change(self, 'x', old_x)
+        self.board.update_position(self, old_x, self._y)
+
+    @property
+    def y(self) -> int:
+        """The y coordinate of this Character."""
+        return self._y
+
+    @y.setter
+    def y(self, value: int) -> None:
+        old_y = self._y
+        self._y = value
+        self.board.record_change(self, 'y', old_y)
+        self.board.update_position(self, self._x, old_y)
 
     def move(self, direction: Tuple[int, int]) -> bool:
         """
@@ -582,6 +672,7 @@ class TurnTaker(Character):
 
     This class is abstract and should not be directly instantiated.
     """
+    __slots__ = ()
 
     def take_turn(self) -> None:
         """
@@ -598,6 +689,7 @@ class RecyclingBin(Character):
     >>> rb.x, rb.y
     (2, 1)
     """
+    __slots__ = ()
 
     def move(self, direction: Tuple[int, int]) -> bool:
         """Move this recycling bin to tile:
@@ -611,6 +703,10 @@ class RecyclingBin(Character):
         If the new tile is occupied by any other Character or if it
         is beyond the boundaries of the board, do nothing and return False.
 
+        A whole row of k RecyclingBins is pushed in O(k) time: the row is
+        scanned once to find the tile past its end, and if that tile is
+        empty, every bin in the row moves one tile.
+
         Precondition:
         direction in DIRECTIONS
 
@@ -622,123 +718,29 @@ class RecyclingBin(Character):
         True
         >>> b.at(0, 1) == [rb]
         True
-        """
-        if direction == UP:
-            return self._rec_move_up()
-        elif direction == DOWN:
-            return self._rec_move_down()
-        elif direction == RIGHT:
-            return self._rec_move_right()
-        else:
-            return self._rec_move_left()
-
-    def _rec_move_up(self) -> bool:
-        """
-        Move the recycling bin up if the player or another recycling bin
-        pushes it up and if it is possible to move up. Return True if it moves
-        and False otherwise.
-
-        >>> b = GameBoard(3, 3)
-        >>> re = RecyclingBin(b, 1, 1)
-        >>> re._rec_move_up()
-        True
-        >>> re._rec_move_up()
-        False
-        """
-        if 0 <= self.y - 1:
-            if self.board.to_grid()[self.y - 1][self.x] == 'B':
-                obj = self.board.at(self.x, self.y - 1)[0]
-                if obj.move(UP):
-                    self.y -= 1
-                    return True
-                return False
-            elif self.board.to_grid()[self.y - 1][self.x] != '-':
-                return False
-            self.y -= 1
-            return True
-        else:
-            return False
-
-    def _rec_move_down(self) -> bool:
-        """
-        Move the recycling bin down if the player or another recycling bin
-        pushes it down and if it is possible to move down. Return True if it
-        moves and False otherwise.
-
-        >>> b = GameBoard(3, 3)
-        >>> re = RecyclingBin(b, 1, 1)
-        >>> re._rec_move_down()
-        True
-        >>> re._rec_move_down()
-        False
-        """
-        if self.board.height > self.y + 1:
-            if self.board.to_grid()[self.y + 1][self.x] == 'B':
-                obj = self.board.at(self.x, self.y + 1)[0]
-                if obj.move(DOWN):
-                    self.y += 1
-                    return True
-                return False
-            elif self.board.to_grid()[self.y + 1][self.x] != '-':
-                return False
-            self.y += 1
-            return True
-        else:
-            return False
-
-    def _rec_move_right(self) -> bool:
-        """
-        Move the recycling bin right if the player or another recycling bin
-        pushes it right if and it is possible to move down. Return True if it
-        moves and False otherwise.
-
-        >>> b = GameBoard(3, 3)
-        >>> re = RecyclingBin(b, 1, 1)
-        >>> re._rec_move_right()
-        True
-        >>> re._rec_move_right()
-        False
-        """
-        if self.board.width > self.x + 1:
-            if self.board.to_grid()[self.y][self.x + 1] == 'B':
-                obj = self.board.at(self.x + 1, self.y)[0]
-                if obj.move(RIGHT):
-                    self.x += 1
-                    return True
-                return False
-            elif self.board.to_grid()[self.y][self.x + 1] != '-':
-                return False
-            self.x += 1
-            return True
-        else:
-            return False
-
-    def _rec_move_left(self) -> bool:
-        """
-        Move the recycling bin left if the player or another recycling bin
-        pushes it left and if it is possible to move down. Return True if it
-        moves and False otherwise.
-
-        >>> b = GameBoard(3, 3)
-        >>> re = RecyclingBin(b, 1, 1)
-        >>> re._rec_move_left()
+        >>> _ = RecyclingBin(b, 1, 1)
+        >>> rb.move(RIGHT)
         True
-        >>> re._rec_move_left()
-        False
-        """
-        if 0 <= self.x - 1:
-            if self.board.to_grid()[self.y][self.x - 1] == 'B':
-                obj = self.board.at(self.x - 1, self.y)[0]
-                if obj.move(LEFT):
-                    self.x -= 1
-                    return True
-                return False
-            elif self.board.to_grid()[self.y][self.x - 1] != '-':
-                return False
-            self.x -= 1
-            return True
-        else:
+        >>> print(b)
+        ----
+        -BB-
+        """
+        dx, dy = direction
+        x, y = self.x + dx, self.y + dy
+        chain = [self]
+        while self.board.on_board(x, y) and self.board.tile_at(x, y) == 'B':
+            chain.append(self.board.at(x, y)[0])
+            x, y = x + dx, y + dy
+        if not self.board.on_board(x, y) or self.board.tile_at(x, y) != '-':
             return False
+        # shift the far end of the chain first so that no two bins ever
+        # share a tile
+        for rb in reversed(chain):
+            if dx:
+                rb.x += dx
+            else:
+                rb.y += dy
+        return True
 
     def get_char(self) -> chr:
         """
@@ -768,12 +770,14 @@ class Player(TurnTaker):
     #   The direction corresponding to the last keypress event that the user
     #   made, or None if there is currently no keypress event left to process
     _last_event: Optional[Tuple[int, int]]
+    __slots__ = ('_last_event',)
 
-    def __init__(self, b: GameBoard, x: int, y: int) -> None:
+    def __init__(self, b: GameBoard, x: int, y: int,
+                 place: bool = True) -> None:
         """Initialize this Player with board <b>,
-        and at tile (<x>, <y>)."""
+        and at tile (<x>, <y>). See Character.__init__ for <place>."""
 
-        TurnTaker.__init__(self, b, x, y)
+        TurnTaker.__init__(self, b, x, y, place)
         self._last_event = None
 
     def record_event(self, direction: Tuple[int, int]) -> None:
@@ -856,16 +860,16 @@ class Player(TurnTaker):
         False
         """
         if 0 <= self.y - 1:
-            if self.board.to_grid()[self.y - 1][self.x] == 'O':
+            if self.board.tile_at(self.x, self.y - 1) == 'O':
                 self.board.at(self.x, self.y - 1)[0].locked = True
                 return True
-            elif self.board.to_grid()[self.y - 1][self.x] == 'B':
+            elif self.board.tile_at(self.x, self.y - 1) == 'B':
                 obj = self.board.at(self.x, self.y - 1)[0]
                 if obj.move(UP):
                     self.y -= 1
                     return True
                 return False
-            elif self.board.to_grid()[self.y - 1][self.x] != '-':
+            elif self.board.tile_at(self.x, self.y - 1) != '-':
                 return False
             self.y -= 1
             return True
@@ -889,16 +893,16 @@ class Player(TurnTaker):
         False
         """
         if self.board.height > self.y + 1:
-            if self.board.to_grid()[self.y + 1][self.x] == 'O':
+            if self.board.tile_at(self.x, self.y + 1) == 'O':
                 self.board.at(self.x, self.y + 1)[0].locked = True
                 return True
-            elif self.board.to_grid()[self.y + 1][self.x] == 'B':
+            elif self.board.tile_at(self.x, self.y + 1) == 'B':
                 obj = self.board.at(self.x, self.y + 1)[0]
                 if obj.move(DOWN):
                     self.y += 1
                     return True
                 return False
-            elif self.board.to_grid()[self.y + 1][self.x] != '-':
+            elif self.board.tile_at(self.x, self.y + 1) != '-':
                 return False
             self.y += 1
             return True
@@ -922,16 +926,16 @@ class Player(TurnTaker):
         False
         """
         if self.board.width > self.x + 1:
-            if self.board.to_grid()[self.y][self.x + 1] == 'O':
+            if self.board.tile_at(self.x + 1, self.y) == 'O':
                 self.board.at(self.x + 1, self.y)[0].locked = True
                 return True
-            elif self.board.to_grid()[self.y][self.x + 1] == 'B':
+            elif self.board.tile_at(self.x + 1, self.y) == 'B':
                 obj = self.board.at(self.x + 1, self.y)[0]
                 if obj.move(RIGHT):
                     self.x += 1
                     return True
                 return False
-            elif self.board.to_grid()[self.y][self.x + 1] != '-':
+            elif self.board.tile_at(self.x + 1, self.y) != '-':
                 return False
             self.x += 1
             return True
@@ -955,16 +959,16 @@ class Player(TurnTaker):
         False
         """
         if 0 <= self.x - 1:
-            if self.board.to_grid()[self.y][self.x - 1] == 'O':
+            if self.board.tile_at(self.x - 1, self.y) == 'O':
                 self.board.at(self.x - 1, self.y)[0].locked = True
                 return True
-            elif self.board.to_grid()[self.y][self.x - 1] == 'B':
+            elif self.board.tile_at(self.x - 1, self.y) == 'B':
                 obj = self.board.at(self.x - 1, self.y)[0]
                 if obj.move(LEFT):
                     self.x -= 1
                     return True
                 return False
-            elif self.board.to_grid()[self.y][self.x - 1] != '-':
+            elif self.board.tile_at(self.x - 1, self.y) != '-':
                 return False
             self.x -= 1
             return True
@@ -996,21 +1000,40 @@ class Raccoon(TurnTaker):
     >>> r.inside_can
     False
     """
-    inside_can: bool
-
-    def __init__(self, b: GameBoard, x: int, y: int) -> None:
+    # === Private Attributes ===
+    # _inside_can:
+    #   whether this Raccoon is inside a garbage can, exposed through the
+    #   inside_can property so that the board's grid stays up to date
+    _inside_can: bool
+    __slots__ = ('_inside_can',)
+
+    def __init__(self, b: GameBoard, x: int, y: int,
+                 place: bool = True) -> None:
         """Initialize this Raccoon with board <b>, and
         at tile (<x>, <y>). Initially a Raccoon is not inside
         of a GarbageCan, unless it is placed directly inside an open GarbageCan.
+        See Character.__init__ for <place>.
 
         >>> r = Raccoon(GameBoard(5, 5), 5, 10)
         """
-        self.inside_can = False
+        self._inside_can = False
         # since this raccoon may be placed inside an open garbage can,
         # we need to initially set the inside_can attribute
         # BEFORE calling the parent init, which is where the raccoon is actually
         # placed on the board.
-        TurnTaker.__init__(self, b, x, y)
+        TurnTaker.__init__(self, b, x, y, place)
+
+    @property
+    def inside_can(self) -> bool:
+        """Whether or not this Raccoon is inside a garbage can."""
+        return self._inside_can
+
+    @inside_can.setter
+    def inside_can(self, value: bool) -> None:
+        old = self._inside_can
+        self._inside_can = value
+        self.board.record_change(self, 'inside_can', old)
+        self.board.update_tile(self.x, self.y)
 
     def check_trapped(self) -> bool:
         """Return True iff this raccoon is trapped. A trapped raccoon is
@@ -1037,7 +1060,7 @@ class Raccoon(TurnTaker):
             return False
         for i in get_neighbours((self.x, self.y)):
             if self.board.on_board(i[0], i[1]):
-                neighbours.append(self.board.to_grid()[i[1]][i[0]])
+                neighbours.append(self.board.tile_at(i[0], i[1]))
             else:
                 trapped += 1
         for i in neighbours:
@@ -1119,7 +1142,7 @@ class Raccoon(TurnTaker):
         """
         if self.y - 1 < 0:
             return False
-        tile = self.board.to_grid()[self.y - 1][self.x]
+        tile = self.board.tile_at(self.x, self.y - 1)
         if tile in 'O-':
             if tile == 'O':
                 self.inside_can = True
@@ -1148,7 +1171,7 @@ class Raccoon(TurnTaker):
         """
         if self.y + 1 >= self.board.height:
             return False
-        tile = self.board.to_grid()[self.y + 1][self.x]
+        tile = self.board.tile_at(self.x, self.y + 1)
         if tile in 'O-':
             if tile == 'O':
                 self.inside_can = True
@@ -1177,7 +1200,7 @@ class Raccoon(TurnTaker):
         """
         if self.x + 1 >= self.board.width:
             return False
-        tile = self.board.to_grid()[self.y][self.x + 1]
+        tile = self.board.tile_at(self.x + 1, self.y)
         if tile in 'O-':
             if tile == 'O':
                 self.inside_can = True
@@ -1206,7 +1229,7 @@ class Raccoon(TurnTaker):
         """
         if self.x - 1 < 0:
             return False
-        tile = self.board.to_grid()[self.y][self.x - 1]
+        tile = self.board.tile_at(self.x - 1, self.y)
         if tile in 'O-':
             if tile == 'O':
                 self.inside_can = True
@@ -1241,10 +1264,10 @@ class Raccoon(TurnTaker):
         """
         if not self.inside_can and not self.check_trapped():
             cannot_move = False
-            direction = get_shuffled_directions()
+            direction = get_shuffled_directions(self.board.rng)
             while not cannot_move:
                 cannot_move = self._random_move(direction)
-                direction = get_shuffled_directions()
+                direction = get_shuffled_directions(self.board.rng)
 
     def _random_move(self, direction: List[Tuple[int, int]]) -> bool:
         """Return True if the raccoon can not move in any direction.
@@ -1307,6 +1330,7 @@ class SmartRaccoon(Raccoon):
     >>> s.inside_can
     False
     """
+    __slots__ = ()
 
     def take_turn(self) -> None:
         """Take a turn in the game.
@@ -1348,19 +1372,19 @@ class SmartRaccoon(Raccoon):
                     self._move_y(y)
             elif x != 0 and y != 0:
                 if y > x and self.x - x >= 0 and\
-                        self.board.to_grid()[self.y][self.x - x] == 'O':
+                        self.board.tile_at(self.x - x, self.y) == 'O':
                     self.move(LEFT)
                 elif x > y and self.y - y >= 0 and\
-                        self.board.to_grid()[self.y - y][self.x] == 'O':
+                        self.board.tile_at(self.x, self.y - y) == 'O':
                     self.move(UP)
                 elif y > x and self.x + x < self.board.width and \
-                        self.board.to_grid()[self.y][self.x + x] == 'O':
+                        self.board.tile_at(self.x + x, self.y) == 'O':
                     self.move(RIGHT)
                 elif x > y and self.y + y < self.board.height and \
-                        self.board.to_grid()[self.y + y][self.x] == 'O':
+                        self.board.tile_at(self.x, self.y + y) == 'O':
                     self.move(DOWN)
             else:
-                direction = get_shuffled_directions()
+                direction = get_shuffled_directions(self.board.rng)
                 self._random_move(direction)
 
     def _closest_x(self) -> int:
@@ -1374,46 +1398,7 @@ class SmartRaccoon(Raccoon):
         >>> s._closest_x()
         2
         """
-        to_remove = []
-        closest = []
-        garbage_x = self._row()[0]
-        obstacles_x = self._row()[1]
-        for i in obstacles_x:
-            for j in garbage_x:
-                if j < self.x and self.x > i > j:
-                    to_remove.append(j)
-                elif j > self.x and j > i > self.x:
-                    to_remove.append(j)
-        for i in to_remove:
-            if garbage_x and i in garbage_x:
-                garbage_x.remove(i)
-        for i in garbage_x:
-            if garbage_x:
-                closest.append(abs(self.x - i))
-        if closest:
-            return min(closest)
-        return 0
-
-    def _row(self) -> List[List[int]]:
-        """Return a list of x-coordinates of garbage cans and obstacles in the
-        same y-axis as self.
-
-        >>> b = GameBoard(3, 3)
-        >>> s = SmartRaccoon(b, 0, 0)
-        >>> _ = GarbageCan(b, 2, 0, False)
-        >>> s._row()
-        [[2], []]
-        """
-        obstacles_x = []
-        garbage_x = []
-        same_row = self.board.to_grid()[self.y]
-        for x in enumerate(same_row):
-            if x[1] in 'OP-S':
-                if x[1] == 'O':
-                    garbage_x.append(x[0])
-            else:
-                obstacles_x.append(x[0])
-        return [garbage_x, obstacles_x]
+        return self._closest(LEFT, RIGHT)
 
     def _closest_y(self) -> int:
         """Return the number of spaces it takes to get to the closest garbage
@@ -1426,50 +1411,24 @@ class SmartRaccoon(Raccoon):
         >>> s._closest_y()
         2
         """
-        to_remove = []
-        closest = []
-        garbage_y = self._col()[0]
-        obstacles_y = self._col()[1]
-        for i in obstacles_y:
-            for j in garbage_y:
-                if j < self.y and j < i < self.y:
-                    to_remove.append(j)
-                elif j > self.y and j > i > self.y:
-                    to_remove.append(j)
-        for i in to_remove:
-            if garbage_y and i in garbage_y:
-                garbage_y.remove(i)
-        for i in garbage_y:
-            if garbage_y:
-                closest.append(abs(self.y - i))
-        if closest:
-            return min(closest)
-        return 0
-
-    def _col(self) -> List[List[int]]:
-        """Return a list of y-coordinates of garbage cans and obstacles in the
-        same x-axis as self.
+        return self._closest(UP, DOWN)
 
-        >>> b = GameBoard(3, 3)
-        >>> s = SmartRaccoon(b, 0, 0)
-        >>> _ = GarbageCan(b, 0, 2, False)
-        >>> s._col()
-        [[2], []]
-        """
-        obstacles_y = []
-        garbage_y = []
-        same_col = []
-        for y in range(len(self.board.to_grid())):
-            for x in range(len(self.board.to_grid()[y])):
-                if x == self.x:
-                    same_col.append(self.board.to_grid()[y][x])
-        for y in enumerate(same_col):
-            if y[1] in 'OP-S':
-                if y[1] == 'O':
-                    garbage_y.append(y[0])
-            else:
-                obstacles_y.append(y[0])
-        return [garbage_y, obstacles_y]
+    def _closest(self, first: Tuple[int, int],
+                 second: Tuple[int, int]) -> int:
+        """Return the number of spaces it takes to get to the closest garbage
+        can that this SmartRaccoon can see in direction <first> or <second>,
+        or 0 if it cannot see one in either direction.
+
+        >>> b = GameBoard(5, 1)
+        >>> s = SmartRaccoon(b, 2, 0)
+        >>> _ = GarbageCan(b, 0, 0, False)
+        >>> _ = GarbageCan(b, 3, 0, True)
+        >>> s._closest(LEFT, RIGHT)
+        2
+        """
+        distances = [self.board.sight_distance(self.x, self.y, direction)
+                     for direction in (first, second)]
+        return min((d for d in distances if d), default=0)
 
     def _move_x(self, x: int) -> None:
         """Indicate which x direction the raccoon is closer to the garbage can.
@@ -1479,10 +1438,10 @@ class SmartRaccoon(Raccoon):
         >>> s._move_x(1)
         """
         if self.x - x >= 0 and \
-                self.board.to_grid()[self.y][self.x - x] == 'O':
+                self.board.tile_at(self.x - x, self.y) == 'O':
             self.move(LEFT)
         elif self.x + x < self.board.width and \
-                self.board.to_grid()[self.y][self.x + x] == 'O':
+                self.board.tile_at(self.x + x, self.y) == 'O':
             self.move(RIGHT)
 
     def _move_y(self, y: int) -> None:
@@ -1493,10 +1452,10 @@ class SmartRaccoon(Raccoon):
         >>> s._move_y(1)
         """
         if self.y - y >= 0 and \
-                self.board.to_grid()[self.y - y][self.x] == 'O':
+                self.board.tile_at(self.x, self.y - y) == 'O':
             self.move(UP)
         elif self.y + y < self.board.height and \
-                self.board.to_grid()[self.y + y][self.x] == 'O':
+                self.board.tile_at(self.x, self.y + y) == 'O':
             self.move(DOWN)
 
     def get_char(self) -> chr:
@@ -1524,14 +1483,33 @@ class GarbageCan(Character):
     >>> g.locked
     False
     """
-    locked: bool
-
-    def __init__(self, b: GameBoard, x: int, y: int, locked: bool) -> None:
+    # === Private Attributes ===
+    # _locked:
+    #   whether this GarbageCan is locked, exposed through the locked property
+    #   so that the board's grid stays up to date
+    _locked: bool
+    __slots__ = ('_locked',)
+
+    def __init__(self, b: GameBoard, x: int, y: int, locked: bool,
+                 place: bool = True) -> None:
         """Initialize this GarbageCan to be at tile (<x>, <y>) and store
-        whether it is locked or not based on <locked>.
+        whether it is locked or not based on <locked>. See Character.__init__
+        for <place>.
         """
-        self.locked = locked
-        Character.__init__(self, b, x, y)
+        self._locked = locked
+        Character.__init__(self, b, x, y, place)
+
+    @property
+    def locked(self) -> bool:
+        """Whether or not this GarbageCan is locked."""
+        return self._locked
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        old = self._locked
+        self._locked = value
+        self.board.record_change(self, 'locked', old)
+        self.board.update_tile(self.x, self.y)
 
     def get_char(self) -> chr:
         """
@@ -1575,7 +1553,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-io': [],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'random', '__future__', 'math'],
+                                   'random', '__future__', 'math', 'gc',
+                                   'a1_grid', 'a1_history', 'a1_index',
+                                   'a1_profile'],
         'disable': ['E1136'],
         'max-attributes': 15,
         'max-module-lines': 1600
@@ -0,0 +1,213 @@
+"""A1: Raccoon Raiders game board backed by a NumPy tile array
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains ArrayGameBoard, a GameBoard that stores its tile codes in
+a compact numpy.uint8 array (one byte per tile) instead of a list of lists of
+strings. The public API is the same as GameBoard's, but the queries that
+look at the whole board at once (trapped_mask and rendering) are done with
+vectorized array operations. check_game_end and adjacent_bin_score, which run
+every tick, keep GameBoard's incremental indexes, which only look again at
+the tiles that changed. largest_clusters labels the recycling bin clusters of
+many boards at once, for a1_batch.
+
+This module requires numpy; a1.py itself does not.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator, List
+
+import numpy as np
+
+from a1 import GameBoard
+
+# Tile codes as bytes, in the format of GameBoard.to_grid
+EMPTY = ord('-')
+PLAYER = ord('P')
+RACCOON = ord('R')
+SMART = ord('S')
+RACCOON_IN_CAN = ord('@')
+OPEN_CAN = ord('O')
+CLOSED_CAN = ord('C')
+BIN = ord('B')
+NEWLINE = ord('\n')
+
+
+def render(tiles: np.ndarray) -> str:
+    """Return the string representation of a board whose tile codes are the
+    2D array <tiles>, in the format expected by GameBoard.setup_from_grid.
+
+    The whole board is rendered in one pass by appending a column of
+    newlines to the tile array and decoding its bytes.
+
+    >>> render(np.frombuffer(b'P--RO-', dtype=np.uint8).reshape(2, 3))
+    'P--\\nRO-'
+    """
+    height, width = tiles.shape
+    rows = np.empty((height, width + 1), dtype=np.uint8)
+    rows[:, :-1] = tiles
+    rows[:, -1] = NEWLINE
+    return rows.tobytes()[:-1].decode('ascii')
+
+
+def largest_clusters(bins: np.ndarray) -> np.ndarray:
+    """Return the size of the largest cluster of adjacent True entries in each
+    2D slice (over the last two axes) of the boolean array <bins>, with the
+    same result as GameBoard.adjacent_bin_score (so at least 1).
+
+    Clusters are labelled by repeatedly giving each bin the smallest label
+    among itself and its neighbours, and then following labels to their
+    own labels (pointer jumping), all with whole-array operations.
+
+    >>> bins = np.array([[[1, 0, 0], [1, 1, 1], [0, 0, 1]],
+    ...                  [[1, 0, 1], [0, 1, 0], [1, 0, 1]]], dtype=bool)
+    >>> largest_clusters(bins)
+    array([5, 1])
+    """
+    shape = bins.shape
+    slices = int(np.prod(shape[:-2]))
+    height, width = shape[-2:]
+    bins = bins.reshape(slices, height, width)
+    sentinel = bins.size
+    labels = np.where(bins, np.arange(bins.size).reshape(bins.shape),
+                      sentinel)
+    padded = np.full((slices, height + 2, width + 2), sentinel,
+                     dtype=labels.dtype)
+    flat_bins = bins.ravel()
+    while True:
+        padded[:, 1:-1, 1:-1] = labels
+        smallest = np.minimum.reduce([labels,
+                                      padded[:, :-2, 1:-1],
+                                      padded[:, 2:, 1:-1],
+                                      padded[:, 1:-1, :-2],
+                                      padded[:, 1:-1, 2:]])
+        smallest = np.where(bins, smallest, sentinel)
+        flat = smallest.ravel()
+        flat[flat_bins] = flat[flat[flat_bins]]
+        if np.array_equal(smallest, labels):
+            break
+        labels = smallest
+    sizes = np.bincount(labels[bins], minlength=sentinel)
+    largest = np.ones(slices, dtype=np.int64)
+    # every label is the flat index of a bin, which tells its slice
+    owners = np.nonzero(sizes)[0]
+    np.maximum.at(largest, owners // (height * width), sizes[owners])
+    return largest.reshape(shape[:-2])
+
+
+class ArrayGameBoard(GameBoard):
+    """A game board whose tile codes are stored in a numpy.uint8 array.
+
+    Row y of the array is row y of to_grid(), and each entry is the ord() of
+    the tile's symbol.
+
+    === Sample Usage ===
+    >>> b = ArrayGameBoard(4, 4)
+    >>> b.setup_from_grid('P-B-\\n-BRB\\n--BB\\n-C--')
+    >>> print(b)
+    P-B-
+    -BRB
+    --BB
+    -C--
+    >>> b.check_game_end()
+    13
+    """
+    _grid: np.ndarray
+
+    def _new_grid(self) -> np.ndarray:
+        """Return an array of empty tiles with this board's dimensions."""
+        return np.full((self.height, self.width), EMPTY, dtype=np.uint8)
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>)."""
+        self._grid[y, x] = ord(code)
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board.
+        """
+        self._grid = np.frombuffer(tiles, dtype=np.uint8).reshape(
+            self.height, self.width).copy()
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return self._grid.tobytes()
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        Precondition:
+        self.on_board(x, y)
+
+        >>> b = ArrayGameBoard(2, 1)
+        >>> b.setup_from_grid('PO')
+        >>> b.tile_at(1, 0)
+        'O'
+        """
+        return chr(self._grid[y, x])
+
+    def to_grid(self) -> List[List[chr]]:
+        """Return the game state as a list of lists of chrs (letters), in the
+        format described in GameBoard.to_grid.
+
+        >>> b = ArrayGameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RC')
+        >>> b.to_grid()
+        [['P', '-', '-'], ['-', 'R', 'C']]
+        """
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [list(row) for row in str(self).split('\n')]
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board, as in
+        GameBoard.iter_rows.
+        """
+        for row in self._grid:
+            yield row.tobytes().decode('ascii')
+
+    def __str__(self) -> str:
+        """Return a string representation of this board, in the format
+        expected by setup_from_grid.
+
+        >>> b = ArrayGameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RO')
+        >>> str(b)
+        'P--\\n-RO'
+        """
+        return render(self._grid)
+
+    def trapped_mask(self) -> np.ndarray:
+        """Return a boolean array that is True exactly at the tiles holding a
+        Raccoon or SmartRaccoon that is trapped (see Raccoon.check_trapped).
+
+        Every raccoon on the board is checked at once, so this takes
+        O(width * height) time, but in vectorized array operations.
+
+        >>> b = ArrayGameBoard(3, 3)
+        >>> b.setup_from_grid('-PB\\n-BR\\n--R')
+        >>> b.trapped_mask().nonzero()
+        (array([1]), array([2]))
+        """
+        # a tile is free if a raccoon could go there; off the board is not
+        free = np.zeros((self.height + 2, self.width + 2), dtype=bool)
+        free[1:-1, 1:-1] = ((self._grid == EMPTY) | (self._grid == OPEN_CAN)
+                            | (self._grid == CLOSED_CAN))
+        exits = (free[:-2, 1:-1] | free[2:, 1:-1]
+                 | free[1:-1, :-2] | free[1:-1, 2:])
+        outside = (self._grid == RACCOON) | (self._grid == SMART)
+        return outside & ~exits
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
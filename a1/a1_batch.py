@@ -0,0 +1,352 @@
+"""A1: Many Raccoon Raiders boards stepped in lockstep with NumPy
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains BatchGame, which holds K boards of the same size as one
+stacked (K, height, width) array of tile codes and gives every board one turn
+(as in GameBoard.give_turns) per call, with whole-batch array operations.
+
+Each board draws its raccoon moves from its own random.Random, exactly the way
+the raccoons of a GameBoard draw them from GameBoard.rng, so board k of a
+batch plays exactly like a GameBoard set up from the same string whose rng is
+in the same state. The Python-level work per
+turn is then shared by the whole batch instead of being paid for every board.
+
+This module requires numpy.
+"""
+
+from __future__ import annotations
+
+from random import Random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from a1 import DIRECTIONS, RACCOON_TURN_FREQUENCY
+from a1_array import (EMPTY, PLAYER, RACCOON, SMART, RACCOON_IN_CAN, OPEN_CAN,
+                      CLOSED_CAN, BIN, render, largest_clusters)
+
+# dx and dy of each direction, indexed like DIRECTIONS
+DX = np.array([direction[0] for direction in DIRECTIONS])
+DY = np.array([direction[1] for direction in DIRECTIONS])
+LEFT_I, UP_I, RIGHT_I, DOWN_I = range(4)
+
+# The code given to tiles that are off the board
+OFF_BOARD = 0
+
+# Tiles a Raccoon can move to or unlock, as in Raccoon.check_trapped ('OC-')
+RACCOON_FREE = np.zeros(256, dtype=bool)
+RACCOON_FREE[[EMPTY, OPEN_CAN, CLOSED_CAN]] = True
+
+# Tiles that block a SmartRaccoon's line of sight, as in a1.SightLines
+SIGHT_BLOCKER = np.zeros(256, dtype=bool)
+SIGHT_BLOCKER[[RACCOON, RACCOON_IN_CAN, CLOSED_CAN, BIN]] = True
+
+
+class BatchGame:
+    """K game boards of the same size that are played in lockstep.
+
+    === Public Attributes ===
+    width:
+        the number of squares wide each board is
+    height:
+        the number of squares high each board is
+    turns:
+        how many turns have passed (the same on every board)
+    ended:
+        an array of K booleans, True for each board whose game has ended
+
+    === Sample Usage ===
+    >>> batch = BatchGame(['P-R\\n---', 'PB-\\nBRB'], [Random(1), Random(2)])
+    >>> batch.handle_events([None, (1, 0)])
+    >>> batch.give_turns()
+    >>> batch.board_str(1)
+    '-PB\\nBRB'
+    >>> batch.check_game_end().tolist()
+    [-1, 12]
+    """
+    # === Private Attributes ===
+    # _tiles:
+    #   the (K, height, width) array of tile codes, in the format of to_grid
+    # _px, _py:
+    #   the coordinates of the Player on each board
+    # _events:
+    #   the index in DIRECTIONS of the move each Player will make on its next
+    #   turn, or -1 if there is none
+    # _rx, _ry:
+    #   (K, R) arrays of raccoon coordinates, where R is the most raccoons on
+    #   any board. Raccoons are in the order GameBoard gives them turns.
+    # _present:
+    #   (K, R) array, True where the board really has that raccoon
+    # _smart:
+    #   (K, R) array, True where that raccoon is a SmartRaccoon
+    # _inside:
+    #   (K, R) array, True where that raccoon is inside a garbage can
+    # _rngs:
+    #   the random generator of each board
+    width: int
+    height: int
+    turns: int
+    ended: np.ndarray
+    _tiles: np.ndarray
+    _px: np.ndarray
+    _py: np.ndarray
+    _events: np.ndarray
+    _rx: np.ndarray
+    _ry: np.ndarray
+    _present: np.ndarray
+    _smart: np.ndarray
+    _inside: np.ndarray
+    _rngs: List[Random]
+
+    def __init__(self, grids: Sequence[str], rngs: Sequence[Random]) -> None:
+        """Initialize a batch with one board for each string in <grids>, in
+        the format of GameBoard.setup_from_grid, where board k draws its
+        raccoon moves from rngs[k].
+
+        Preconditions:
+        - len(grids) == len(rngs) > 0
+        - every grid has the same width and height and exactly one Player
+        """
+        rows = [grid.split('\n') for grid in grids]
+        self.height, self.width = len(rows[0]), len(rows[0][0])
+        self.turns = 0
+        self.ended = np.zeros(len(grids), dtype=bool)
+        self._tiles = np.array([[list(row.encode('ascii')) for row in lines]
+                                for lines in rows], dtype=np.uint8)
+        k, ys, xs = np.nonzero(self._tiles == PLAYER)
+        self._px = np.zeros(len(grids), dtype=np.intp)
+        self._py = np.zeros(len(grids), dtype=np.intp)
+        self._px[k], self._py[k] = xs, ys
+        self._events = np.full(len(grids), -1, dtype=np.intp)
+        self._rngs = list(rngs)
+
+        # setup_from_grid creates raccoons in row-major order
+        codes = self._tiles.reshape(len(grids), -1)
+        is_raccoon = ((codes == RACCOON) | (codes == SMART)
+                      | (codes == RACCOON_IN_CAN))
+        counts = is_raccoon.sum(axis=1)
+        most = int(counts.max())
+        self._present = np.arange(most) < counts[:, None]
+        self._rx = np.zeros(self._present.shape, dtype=np.intp)
+        self._ry = np.zeros(self._present.shape, dtype=np.intp)
+        k, flat = np.nonzero(is_raccoon)
+        slot = np.arange(len(k)) - np.repeat(np.cumsum(counts) - counts,
+                                             counts)
+        self._rx[k, slot], self._ry[k, slot] = flat % self.width, \
+            flat // self.width
+        self._smart = np.zeros(self._present.shape, dtype=bool)
+        self._smart[k, slot] = codes[k, flat] == SMART
+        self._inside = np.zeros(self._present.shape, dtype=bool)
+        self._inside[k, slot] = codes[k, flat] == RACCOON_IN_CAN
+
+    def handle_events(self,
+                      directions: Sequence[Optional[Tuple[int, int]]]) -> None:
+        """Record directions[k] as the next move of the Player on board k,
+        like GameBoard.handle_event. None records nothing for that board.
+        """
+        for k, direction in enumerate(directions):
+            if direction is not None:
+                self._events[k] = DIRECTIONS.index(direction)
+
+    def board_str(self, k: int) -> str:
+        """Return the string representation of board <k>, in the format of
+        GameBoard.__str__.
+        """
+        return render(self._tiles[k])
+
+    def give_turns(self) -> None:
+        """Give every turn-taking character on every board one turn, exactly
+        like GameBoard.give_turns does on each board, and then check whether
+        each game has ended.
+        """
+        self._player_turns()
+        self.turns += 1
+        if self.turns % RACCOON_TURN_FREQUENCY == 0:
+            for r in range(self._present.shape[1]):
+                self._raccoon_turns(r)
+        self.check_game_end()
+
+    def check_game_end(self) -> np.ndarray:
+        """Check which games have ended, like GameBoard.check_game_end, and
+        return an array with the score of each board, or -1 for each board
+        whose game has not ended.
+
+        Every game that has ended is recorded in the ended attribute.
+        """
+        trapped = self._present & ~self._inside & self._trapped(self._rx,
+                                                                 self._ry)
+        outside = self._present & ~self._inside
+        over = (trapped == outside).all(axis=1)
+        self.ended |= over
+        scores = np.full(len(over), -1, dtype=np.int64)
+        if over.any():
+            bins = largest_clusters(self._tiles[over] == BIN)
+            scores[over] = trapped[over].sum(axis=1) * 10 + bins
+        return scores
+
+    def _codes(self, boards: np.ndarray, xs: np.ndarray,
+               ys: np.ndarray) -> np.ndarray:
+        """Return the codes of tiles (xs, ys) on <boards>, with OFF_BOARD for
+        the tiles that are not on the board. The arrays broadcast together.
+        """
+        on = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        codes = self._tiles[boards, np.clip(ys, 0, self.height - 1),
+                            np.clip(xs, 0, self.width - 1)]
+        return np.where(on, codes, OFF_BOARD)
+
+    def _trapped(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return whether a raccoon at each of (xs, ys) (arrays with K rows)
+        would be trapped, like Raccoon.check_trapped for a raccoon that is not
+        inside a garbage can.
+        """
+        boards = np.arange(len(xs)).reshape((-1,) + (1,) * (xs.ndim - 1))
+        free = np.zeros(xs.shape, dtype=bool)
+        for d in range(4):
+            free |= RACCOON_FREE[self._codes(boards, xs + DX[d], ys + DY[d])]
+        return ~free
+
+    def _player_turns(self) -> None:
+        """Make the move each Player recorded, like Player.take_turn."""
+        k = np.nonzero(self._events >= 0)[0]
+        d = self._events[k]
+        self._events[:] = -1
+        px, py = self._px[k], self._py[k]
+        tx, ty = px + DX[d], py + DY[d]
+        target = self._codes(k, tx, ty)
+
+        lock = target == OPEN_CAN
+        self._tiles[k[lock], ty[lock], tx[lock]] = CLOSED_CAN
+
+        # a row of bins moves if the first tile past its end is empty
+        steps = np.arange(1, max(self.width, self.height) + 1)
+        ray = self._codes(k[:, None], px[:, None] + DX[d][:, None] * steps,
+                          py[:, None] + DY[d][:, None] * steps)
+        end = np.argmax(ray != BIN, axis=1)
+        push = (target == BIN) & (ray[np.arange(len(k)), end] == EMPTY)
+        ex = px[push] + DX[d[push]] * (end[push] + 1)
+        ey = py[push] + DY[d[push]] * (end[push] + 1)
+        self._tiles[k[push], ey, ex] = BIN
+
+        walk = (target == EMPTY) | push
+        self._tiles[k[walk], py[walk], px[walk]] = EMPTY
+        self._tiles[k[walk], ty[walk], tx[walk]] = PLAYER
+        self._px[k[walk]], self._py[k[walk]] = tx[walk], ty[walk]
+
+    def _raccoon_turns(self, r: int) -> None:
+        """Give raccoon number <r> of every board its turn, like
+        Raccoon.take_turn and SmartRaccoon.take_turn.
+        """
+        rx, ry = self._rx[:, r], self._ry[:, r]
+        active = self._present[:, r] & ~self._inside[:, r] \
+            & ~self._trapped(rx, ry)
+        direction = np.full(len(rx), -1, dtype=np.intp)
+        wander = active & ~self._smart[:, r]
+
+        smart = np.nonzero(active & self._smart[:, r])[0]
+        if len(smart):
+            chosen = self._smart_directions(smart, rx[smart], ry[smart])
+            direction[smart] = chosen
+            wander[smart[chosen == -2]] = True
+            direction[smart[chosen == -2]] = -1
+
+        boards = np.nonzero(wander)[0]
+        if len(boards):
+            orders = np.empty((len(boards), 4), dtype=np.intp)
+            for i, k in enumerate(boards):
+                order = list(range(4))
+                self._rngs[k].shuffle(order)
+                orders[i] = order
+                if not self._smart[k, r]:
+                    # Raccoon.take_turn shuffles again after it has moved
+                    self._rngs[k].shuffle(list(range(4)))
+            free = RACCOON_FREE[self._codes(
+                boards[:, None], rx[boards][:, None] + DX[orders],
+                ry[boards][:, None] + DY[orders])]
+            direction[boards] = orders[np.arange(len(boards)),
+                                       np.argmax(free, axis=1)]
+
+        k = np.nonzero(direction >= 0)[0]
+        d = direction[k]
+        tx, ty = rx[k] + DX[d], ry[k] + DY[d]
+        target = self._codes(k, tx, ty)
+        unlock = target == CLOSED_CAN
+        self._tiles[k[unlock], ty[unlock], tx[unlock]] = OPEN_CAN
+        into_can = target == OPEN_CAN
+        move = (target == EMPTY) | into_can
+        k, tx, ty, into_can = k[move], tx[move], ty[move], into_can[move]
+        own = np.where(self._smart[k, r], SMART, RACCOON)
+        self._tiles[k, ry[k], rx[k]] = EMPTY
+        self._tiles[k, ty, tx] = np.where(into_can, RACCOON_IN_CAN, own)
+        self._inside[k, r] = into_can
+        self._rx[k, r], self._ry[k, r] = tx, ty
+
+    def _smart_directions(self, boards: np.ndarray, sx: np.ndarray,
+                          sy: np.ndarray) -> np.ndarray:
+        """Return the index in DIRECTIONS of the move that the SmartRaccoon at
+        (sx, sy) on each of <boards> tries, -1 if it does not try to move, or
+        -2 if it moves randomly instead, following SmartRaccoon.take_turn.
+        """
+        rows = self._tiles[boards, sy, :]
+        cols = self._tiles[boards, :, sx]
+        x = self._closest(rows, sx)
+        y = self._closest(cols, sy)
+        n = np.arange(len(boards))
+
+        def is_open(line: np.ndarray, pos: np.ndarray) -> np.ndarray:
+            inside = (pos >= 0) & (pos < line.shape[1])
+            return inside & (line[n, np.clip(pos, 0, line.shape[1] - 1)]
+                             == OPEN_CAN)
+
+        left, right = is_open(rows, sx - x), is_open(rows, sx + x)
+        up, down = is_open(cols, sy - y), is_open(cols, sy + y)
+
+        only_x = (x != 0) & (y == 0)
+        only_y = (x == 0) & (y != 0)
+        both = (x != 0) & (y != 0)
+        conditions = [
+            only_x & left, only_x & right,
+            only_y & up, only_y & down,
+            both & (y > x) & left, both & (x > y) & up,
+            both & (y > x) & right, both & (x > y) & down,
+            (x == 0) & (y == 0)]
+        choices = [LEFT_I, RIGHT_I, UP_I, DOWN_I,
+                   LEFT_I, UP_I, RIGHT_I, DOWN_I, -2]
+        return np.select(conditions, choices, default=-1)
+
+    def _closest(self, lines: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """Return the distance from pos[i] to the closest open garbage can in
+        lines[i] that nothing blocks, or 0 if there is none, like
+        SmartRaccoon._closest_x and SmartRaccoon._closest_y.
+        """
+        length = lines.shape[1]
+        steps = np.arange(1, length)
+        n = np.arange(len(lines))[:, None]
+        closest = np.zeros(len(lines), dtype=np.intp)
+        if length == 1:
+            return closest
+        for sign in (-1, 1):
+            spots = pos[:, None] + sign * steps
+            inside = (spots >= 0) & (spots < length)
+            codes = np.where(inside,
+                             lines[n, np.clip(spots, 0, length - 1)],
+                             OFF_BOARD)
+            hit = (codes == OPEN_CAN) | SIGHT_BLOCKER[codes]
+            first = np.argmax(hit, axis=1)
+            seen = hit.any(axis=1) & (codes[n[:, 0], first] == OPEN_CAN)
+            distance = np.where(seen, first + 1, 0)
+            closest = np.where((closest == 0)
+                               | ((distance != 0) & (distance < closest)),
+                               distance, closest)
+        return closest
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
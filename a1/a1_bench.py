@@ -0,0 +1,272 @@
+"""A1: Performance benchmarks for the Raccoon Raiders game board
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module times the core GameBoard operations on random boards of several
+sizes and entity densities, and saves the timings as JSON so that runs can be
+compared to catch scaling regressions. Run it from this directory:
+
+    python a1_bench.py --output bench.json
+    python a1_bench.py --output new.json --compare bench.json
+
+Each benchmark is run <repeat> times (with any setup it needs done outside of
+the timed part) and the best and mean times of one run are reported.
+
+With --memory, it instead reports how many bytes each kind of Character
+takes up on a board, with its compact __slots__ layout and with a
+per-instance __dict__ like the original classes had:
+
+    python a1_bench.py --memory
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+from random import Random
+from statistics import mean
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import a1
+
+# Board sizes (width = height) and entity densities benchmarked by default
+SIZES = [10, 50, 200]
+DENSITIES = [0.1, 0.3, 0.6]
+
+# How the non-empty tiles of a benchmark board are split between characters
+MIX = 'BBBBBBRSOOC'
+
+# A benchmark result: its name, board parameters and timings
+Record = Dict[str, object]
+
+
+def make_grid(size: int, density: float, rng: Random) -> str:
+    """Return a random <size> by <size> board string for setup_from_grid, with
+    the Player at the top-left corner and about <density> of the other tiles
+    occupied by characters drawn from MIX.
+
+    >>> grid = make_grid(3, 1.0, Random(148))
+    >>> grid[0], grid.count('-'), grid.count('\\n')
+    ('P', 0, 2)
+    """
+    tiles = [rng.choice(MIX) if rng.random() < density else '-'
+             for _ in range(size * size)]
+    tiles[0] = 'P'
+    return '\n'.join(''.join(tiles[y * size:(y + 1) * size])
+                     for y in range(size))
+
+
+def make_board(grid: str) -> a1.GameBoard:
+    """Return a new GameBoard set up from <grid>, whose raccoons always make
+    the same moves.
+    """
+    board = a1.GameBoard(1, 1, Random(148))
+    board.setup_from_grid(grid)
+    return board
+
+
+def time_it(run: Callable[[object], object],
+            setup: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Return the best and mean time, in seconds, of calling run(setup())
+    <repeat> times, where only run is timed.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = perf_counter()
+        run(arg)
+        times.append(perf_counter() - start)
+    return {'best': min(times), 'mean': mean(times)}
+
+
+def push_row(board: a1.GameBoard) -> None:
+    """Make the Player on <board> (from chain_grid) push its row of bins."""
+    board.handle_event(a1.RIGHT)
+    board.give_turns()
+
+
+def chain_grid(size: int) -> str:
+    """Return a <size> by <size> board string whose top row is the Player
+    followed by a row of size // 2 recycling bins.
+    """
+    top = 'P' + 'B' * (size // 2)
+    rows = [top + '-' * (size - len(top))] + ['-' * size] * (size - 1)
+    return '\n'.join(rows)
+
+
+def smart_turns(board: a1.GameBoard) -> None:
+    """Give every SmartRaccoon on <board> one turn."""
+    for y, row in enumerate(board.to_grid()):
+        for x, code in enumerate(row):
+            if code == 'S':
+                board.at(x, y)[0].take_turn()
+
+
+def benchmarks(size: int, density: float, repeat: int) -> List[Record]:
+    """Return the timings of every benchmark on <size> by <size> boards with
+    entity density <density>.
+    """
+    rng = Random(f'{size}:{density}')
+    grid = make_grid(size, density, rng)
+    board = make_board(grid)
+    coords = [(rng.randrange(size), rng.randrange(size)) for _ in range(1000)]
+    moves = [rng.choice(a1.DIRECTIONS)
+             for _ in range(a1.RACCOON_TURN_FREQUENCY)]
+
+    def ticks(b: a1.GameBoard) -> None:
+        for move in moves:
+            b.handle_event(move)
+            b.give_turns()
+
+    def fresh() -> a1.GameBoard:
+        return make_board(grid)
+
+    def same() -> a1.GameBoard:
+        return board
+
+    cases = {
+        'at_x1000': (lambda b: [b.at(x, y) for x, y in coords], same),
+        'to_grid': (lambda b: b.to_grid(), same),
+        'str': (str, same),
+        'setup_from_grid': (make_board, lambda: grid),
+        'give_turns_x20': (ticks, fresh),
+        'check_game_end': (lambda b: b.check_game_end(), fresh),
+        'adjacent_bin_score_cold': (lambda b: b.adjacent_bin_score(), fresh),
+        'adjacent_bin_score_warm': (lambda b: b.adjacent_bin_score(), same),
+        'recycling_bin_chain_push': (push_row,
+                                     lambda: make_board(chain_grid(size))),
+        'smart_raccoon_take_turn': (smart_turns, fresh),
+    }
+    board.adjacent_bin_score()  # so that the warm benchmark is warm
+    records = []
+    for name, (run, setup) in cases.items():
+        timing = time_it(run, setup, repeat)
+        records.append({'benchmark': name, 'size': size, 'density': density,
+                        'entities': len(grid) - grid.count('-')
+                        - grid.count('\n'), 'repeat': repeat, **timing})
+    return records
+
+
+def entity_bytes(kind: type, count: int) -> float:
+    """Return the average number of bytes allocated to place each of <count>
+    new characters of class <kind> on a board, including the board's own
+    bookkeeping for them.
+    """
+    size = int(count ** 0.5) + 1
+    board = a1.GameBoard(size, size)
+    args = (False,) if issubclass(kind, a1.GarbageCan) else ()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        characters = [kind(board, i % size, i // size, *args)
+                      for i in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(characters) == count
+    return used / count
+
+
+def memory_report(count: int = 10000) -> List[Record]:
+    """Return the bytes per character of each kind of Character, with the
+    classes' __slots__ and with a per-instance __dict__ (measured on a
+    subclass that does not declare __slots__).
+
+    >>> report = memory_report(100)
+    >>> all(r['slots'] < r['dict'] for r in report)
+    True
+    """
+    records = []
+    for kind in [a1.RecyclingBin, a1.GarbageCan, a1.Raccoon,
+                 a1.SmartRaccoon, a1.Player]:
+        with_dict = type(kind.__name__, (kind,), {})
+        records.append({'entity': kind.__name__, 'count': count,
+                        'slots': entity_bytes(kind, count),
+                        'dict': entity_bytes(with_dict, count)})
+    return records
+
+
+def compare(old: List[Record], new: List[Record], tolerance: float,
+            floor: float = 1e-4) -> List[str]:
+    """Return a description of each benchmark in <new> whose best time is more
+    than <tolerance> times its best time in <old>.
+
+    Benchmarks that take less than <floor> seconds are too noisy to compare
+    and are skipped.
+
+    >>> old = [{'benchmark': 'str', 'size': 10, 'density': 0.1, 'best': 1.0}]
+    >>> compare(old, [dict(old[0], best=1.2)], 1.5)
+    []
+    >>> compare(old, [dict(old[0], best=2.0)], 1.5)
+    ['str size=10 density=0.1: 1.000000s -> 2.000000s (2.00x)']
+    >>> compare(old, [dict(old[0], best=2.0)], 1.5, floor=3.0)
+    []
+    """
+    before = {(r['benchmark'], r['size'], r['density']): r['best']
+              for r in old}
+    slower = []
+    for record in new:
+        key = (record['benchmark'], record['size'], record['density'])
+        if key in before and record['best'] > max(before[key] * tolerance,
+                                                  floor):
+            slower.append(f'{key[0]} size={key[1]} density={key[2]}: '
+                          f'{before[key]:.6f}s -> {record["best"]:.6f}s '
+                          f'({record["best"] / before[key]:.2f}x)')
+    return slower
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks described by the command line arguments <argv>,
+    save or print the results, and return the exit status.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=DENSITIES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='file to save the JSON results to '
+                                         '(printed if not given)')
+    parser.add_argument('--compare', help='JSON results of an earlier run; '
+                                          'exit with status 1 if anything '
+                                          'got slower than --tolerance')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--memory', action='store_true',
+                        help='report the bytes per character instead')
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        for record in memory_report():
+            print(f"{record['entity']:>12}: {record['slots']:7.1f} bytes "
+                  f"with __slots__, {record['dict']:7.1f} bytes with "
+                  f"__dict__")
+        return 0
+
+    records = []
+    for size in args.sizes:
+        for density in args.densities:
+            records.extend(benchmarks(size, density, args.repeat))
+    results = json.dumps(records, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(results + '\n')
+    else:
+        print(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(json.load(f), records, args.tolerance)
+        for line in slower:
+            print(f'SLOWER: {line}', file=sys.stderr)
+        return int(bool(slower))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
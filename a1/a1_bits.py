@@ -0,0 +1,190 @@
+"""A1: Raccoon Raiders game board with bitset queries
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains BitGameBoard, a GameBoard that answers questions about
+the whole board with bitsets: one Python int per kind of tile, with one bit
+per tile. Neighbour and trap queries become shifts and masks of those ints,
+which Python does many tiles at a time. These are bulk queries: the checks
+that run every tick (check_game_end and adjacent_bin_score) are inherited
+from GameBoard, whose indexes are kept up to date as tiles change, since
+making a bitset after a tile changes costs a pass over the whole board.
+
+Bit i of a bitset is the tile at index i of the board's string (see
+GameBoard.__str__), so tile (x, y) is bit y * (width + 1) + x. The bit at
+x == width of each row stands for the newline, and is never set. It keeps
+the rows apart, so that shifting a bitset by one bit moves every tile to its
+left or right neighbour without wrapping around to another row, and shifting
+it by width + 1 bits moves every tile up or down.
+
+Setting a single bit of an int copies the whole int, so a BitGameBoard stores
+its tile codes in a bytearray laid out like its string, which makes reading
+and writing a tile O(1) and rendering the board a single decode. A bitset is
+made from the bytearray (in C, with bytes.translate and int) the first time
+it is needed after a tile changes, and is reused until the next change.
+"""
+
+from __future__ import annotations
+
+from random import Random
+from typing import Dict, Iterator, List, Optional
+
+from a1 import GameBoard
+
+# bytes.translate tables that map the tile codes in their key to b'1' and
+# every other byte to b'0', made when first needed
+_TABLES: Dict[str, bytes] = {}
+
+
+def popcount(bits: int) -> int:
+    """Return the number of set bits of the bitset <bits>.
+
+    >>> popcount(0b101101)
+    4
+    """
+    return bin(bits).count('1')
+
+
+class BitGameBoard(GameBoard):
+    """A game board that answers whole-board queries with bitsets.
+
+    === Sample Usage ===
+    >>> b = BitGameBoard(4, 4)
+    >>> b.setup_from_grid('P-B-\\n-BRB\\n--BB\\n-C--')
+    >>> bin(b.bitset('B'))
+    '0b11000101000100'
+    >>> b.check_game_end()
+    13
+    """
+    # === Private Attributes ===
+    # _bitsets:
+    #   the bitsets made since the last change to a tile, by the tile codes
+    #   whose tiles they contain
+    _grid: bytearray
+    _bitsets: Dict[str, int]
+
+    def __init__(self, w: int, h: int, rng: Optional[Random] = None) -> None:
+        """Initialize this board to be an empty <w> by <h> board that draws
+        randomness from <rng> (see GameBoard.__init__).
+        """
+        GameBoard.__init__(self, w, h, rng)
+        self._bitsets = {}
+
+    def _new_grid(self) -> bytearray:
+        """Return the tile codes of an empty board, laid out like its
+        string.
+        """
+        return bytearray(b'\n'.join([b'-' * self.width] * self.height))
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>)."""
+        self._grid[y * (self.width + 1) + x] = ord(code)
+        if self._bitsets:
+            self._bitsets = {}
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board.
+        """
+        width = self.width
+        self._grid = bytearray(b'\n'.join(
+            tiles[y * width:(y + 1) * width] for y in range(self.height)))
+        self._bitsets = {}
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return self._grid.replace(b'\n', b'')
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        Precondition:
+        self.on_board(x, y)
+        """
+        return chr(self._grid[y * (self.width + 1) + x])
+
+    def to_grid(self) -> List[List[chr]]:
+        """Return the game state as a list of lists of chrs (letters), in the
+        format described in GameBoard.to_grid.
+
+        >>> b = BitGameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RC')
+        >>> b.to_grid()
+        [['P', '-', '-'], ['-', 'R', 'C']]
+        """
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [list(row) for row in str(self).split('\n')]
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board, as in
+        GameBoard.iter_rows.
+        """
+        stride = self.width + 1
+        for i in range(0, self.height * stride, stride):
+            yield self._grid[i:i + self.width].decode('ascii')
+
+    def __str__(self) -> str:
+        """Return a string representation of this board, in the format
+        expected by setup_from_grid.
+        """
+        return self._grid.decode('ascii')
+
+    def bitset(self, codes: str) -> int:
+        """Return the bitset of the tiles whose tile code is in <codes>.
+
+        >>> b = BitGameBoard(3, 2)
+        >>> b.setup_from_grid('P-O\\n-RC')
+        >>> bin(b.bitset('OC'))
+        '0b1000100'
+        """
+        bits = self._bitsets.get(codes)
+        if bits is None:
+            table = _TABLES.get(codes)
+            if table is None:
+                table = bytes(0x31 if chr(i) in codes and i != 0x0A else 0x30
+                              for i in range(256))
+                _TABLES[codes] = table
+            bits = int(self._grid.translate(table)[::-1], 2)
+            self._bitsets[codes] = bits
+        return bits
+
+    def neighbours(self, bits: int) -> int:
+        """Return the bitset of the tiles on this board that are beside (in
+        one of the four directions) a tile of the bitset <bits>.
+
+        >>> b = BitGameBoard(3, 2)
+        >>> bin(b.neighbours(0b1))  # beside (0, 0) are (1, 0) and (0, 1)
+        '0b10010'
+        """
+        stride = self.width + 1
+        return ((bits << 1 | bits >> 1 | bits << stride | bits >> stride)
+                & self.bitset('-PRS@OCB'))
+
+    def trapped_mask(self) -> int:
+        """Return the bitset of the tiles holding a Raccoon or SmartRaccoon
+        that is trapped (see Raccoon.check_trapped).
+
+        Every raccoon on the board is checked at once, in O(width * height)
+        time. check_game_end does not use this, since it only checks the
+        raccoons around the tiles that changed.
+
+        >>> b = BitGameBoard(3, 3)
+        >>> b.setup_from_grid('-PB\\n-BR\\n--R')
+        >>> bin(b.trapped_mask())
+        '0b1000000'
+        """
+        return self.bitset('RS') & ~self.neighbours(self.bitset('-OC'))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,428 @@
+"""A1: Raccoon Raiders game board with a compact store for immobile characters
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains CompactGameBoard, a GameBoard for very large levels.
+
+Most characters on a large board are garbage cans, which never move, and
+recycling bins, which only move when they are pushed. A CompactGameBoard does
+not create a Python object for each of the cans and bins in the grid given to
+setup_from_grid. Instead, it keeps their coordinates, kinds and lock flags in
+the parallel arrays of an EntityStore, and only builds a lightweight handle
+object for one of them when it is asked for, e.g. by at(). Handles for the
+same stored character compare equal, and moving or unlocking a handle changes
+the store.
+
+The Player and the raccoons, which take turns, are ordinary characters, and
+so are any characters created directly (e.g. with RecyclingBin(board, x, y)).
+Only they are scanned by give_turns and check_game_end.
+"""
+
+from __future__ import annotations
+
+from array import array
+from random import Random
+from typing import Iterator, List, Optional, Tuple, Union
+
+from a1 import (GameBoard, Character, Raccoon, SmartRaccoon, Player,
+                GarbageCan, RecyclingBin)
+from a1_grid import iter_occupied
+
+# The kinds of stored characters, as the byte of their unlocked tile code
+BIN = ord('B')
+CAN = ord('O')
+
+# The flag that is set for a locked garbage can
+LOCKED = 1
+
+
+class EntityStore:
+    """Parallel arrays that describe the garbage cans and recycling bins of
+    a board, which are identified by their index in the arrays.
+
+    === Public Attributes ===
+    xs, ys:
+        the coordinates of each stored character
+    kinds:
+        the kind of each stored character, BIN or CAN
+    flags:
+        the flags of each stored character: LOCKED for a locked garbage can
+
+    === Representation Invariants ===
+    xs, ys, kinds and flags all have the same length.
+    No two stored characters are on the same tile.
+
+    === Sample Usage ===
+    >>> store = EntityStore(3, 2)
+    >>> store.add(2, 1, CAN, True)
+    0
+    >>> store.add(0, 0, BIN, False)
+    1
+    >>> store.id_at(2, 1), store.code(0)
+    (0, 'C')
+    >>> store.move(1, 1, 0)
+    >>> store.id_at(0, 0), store.id_at(1, 0)
+    (-1, 1)
+    """
+    # === Private Attributes ===
+    # _width:
+    #   the width of the board
+    # _ids:
+    #   the index of the stored character on each tile, by flat index
+    #   y * width + x, or -1 for a tile without one
+    xs: array
+    ys: array
+    kinds: bytearray
+    flags: bytearray
+    _width: int
+    _ids: array
+
+    def __init__(self, width: int, height: int) -> None:
+        """Initialize an empty store for a <width> by <height> board."""
+        self.xs = array('i')
+        self.ys = array('i')
+        self.kinds = bytearray()
+        self.flags = bytearray()
+        self._width = width
+        self._ids = array('i', [-1]) * (width * height)
+
+    def __len__(self) -> int:
+        """Return the number of stored characters."""
+        return len(self.kinds)
+
+    def add(self, x: int, y: int, kind: int, locked: bool) -> int:
+        """Store a character of kind <kind> on tile (<x>, <y>), which is locked
+        iff <locked>, and return its index.
+
+        Precondition:
+        no character is stored on tile (<x>, <y>)
+        """
+        self.xs.append(x)
+        self.ys.append(y)
+        self.kinds.append(kind)
+        self.flags.append(LOCKED if locked else 0)
+        self._ids[y * self._width + x] = len(self.kinds) - 1
+        return len(self.kinds) - 1
+
+    def id_at(self, x: int, y: int) -> int:
+        """Return the index of the character stored on tile (<x>, <y>), or -1
+        if there is none.
+        """
+        return self._ids[y * self._width + x]
+
+    def move(self, i: int, x: int, y: int) -> None:
+        """Move stored character <i> to tile (<x>, <y>).
+
+        Precondition:
+        no other character is stored on tile (<x>, <y>)
+        """
+        self._ids[self.ys[i] * self._width + self.xs[i]] = -1
+        self.xs[i] = x
+        self.ys[i] = y
+        self._ids[y * self._width + x] = i
+
+    def code(self, i: int) -> str:
+        """Return the tile code of stored character <i> on its own."""
+        if self.kinds[i] == BIN:
+            return 'B'
+        return 'C' if self.flags[i] & LOCKED else 'O'
+
+
+class StoredCharacter:
+    """A handle to a character kept in the EntityStore of a CompactGameBoard.
+
+    Handles are created on demand by the board and are not placed on it when
+    they are created. Two handles to the same stored character are equal.
+
+    A handle's coordinates are kept in the store, so handles do not inherit
+    from Character, whose instances keep their own coordinates. They move
+    and look like the characters they stand for (see StoredRecyclingBin and
+    StoredGarbageCan).
+
+    This class is abstract and should not be directly instantiated.
+    """
+    # === Private Attributes ===
+    # _store:
+    #   the store that this character is kept in
+    # _id:
+    #   the index of this character in _store
+    board: CompactGameBoard
+    _store: EntityStore
+    _id: int
+    __slots__ = ('board', '_store', '_id')
+
+    def __init__(self, b: CompactGameBoard, store: EntityStore,
+                 i: int) -> None:
+        """Initialize a handle to character <i> of <store>, which is on board
+        <b>.
+        """
+        self.board = b
+        self._store = store
+        self._id = i
+
+    @property
+    def x(self) -> int:
+        """The x coordinate of this character."""
+        return self._store.xs[self._id]
+
+    @x.setter
+    def x(self, value: int) -> None:
+        old_x = self.x
+        self._store.move(self._id, value, self.y)
+        self.board.record_change(self, 'x', old_x)
+        self.board.update_position(self, old_x, self.y)
+
+    @property
+    def y(self) -> int:
+        """The y coordinate of this character."""
+        return self._store.ys[self._id]
+
+    @y.setter
+    def y(self, value: int) -> None:
+        old_y = self.y
+        self._store.move(self._id, self.x, value)
+        self.board.record_change(self, 'y', old_y)
+        self.board.update_position(self, self.x, old_y)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether <other> is a handle to the same stored character."""
+        return type(other) is type(self) and other._store is self._store \
+            and other._id == self._id
+
+    def __hash__(self) -> int:
+        """Return a hash that is the same for equal handles."""
+        return hash((id(self._store), self._id))
+
+
+class StoredRecyclingBin(StoredCharacter):
+    """A handle to a recycling bin kept in an EntityStore."""
+    __slots__ = ()
+
+    def move(self, direction: Tuple[int, int]) -> bool:
+        """Move this recycling bin as RecyclingBin.move does."""
+        return RecyclingBin.move(self, direction)
+
+    def get_char(self) -> chr:
+        """Return 'B' to represent a recycling bin."""
+        return RecyclingBin.get_char(self)
+
+
+class StoredGarbageCan(StoredCharacter):
+    """A handle to a garbage can kept in an EntityStore."""
+    __slots__ = ()
+
+    def move(self, direction: Tuple[int, int]) -> bool:
+        """Garbage cans cannot move, so always return False."""
+        return GarbageCan.move(self, direction)
+
+    def get_char(self) -> chr:
+        """Return 'C' to represent a closed garbage can and 'O' to represent
+        an open garbage can.
+        """
+        return GarbageCan.get_char(self)
+
+    @property
+    def locked(self) -> bool:
+        """Whether or not this GarbageCan is locked."""
+        return bool(self._store.flags[self._id] & LOCKED)
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        old = self.locked
+        self._store.flags[self._id] = LOCKED if value else 0
+        self.board.record_change(self, 'locked', old)
+        self.board.update_tile(self.x, self.y)
+
+
+class CompactGameBoard(GameBoard):
+    """A game board that keeps the garbage cans and recycling bins of the grid
+    it is set up from in an EntityStore, and its tile codes in one bytearray
+    per row.
+
+    === Sample Usage ===
+    >>> b = CompactGameBoard(1, 1)
+    >>> b.setup_from_grid('PB-\\n-R-\\n-C-')
+    >>> bin_ = b.at(1, 0)[0]
+    >>> bin_.get_char(), bin_ == b.at(1, 0)[0]
+    ('B', True)
+    >>> b.handle_event((1, 0))
+    >>> b.give_turns()
+    >>> print(b)
+    -PB
+    -R-
+    -C-
+    >>> (bin_.x, bin_.y)
+    (2, 0)
+    """
+    # === Private Attributes ===
+    # _store:
+    #   the garbage cans and recycling bins created by setup_from_grid. They
+    #   are not in _list_of_char or _tiles.
+    _store: EntityStore
+    _grid: List[bytearray]
+
+    def __init__(self, w: int, h: int, rng: Optional[Random] = None) -> None:
+        """Initialize this board to be an empty <w> by <h> board that draws
+        randomness from <rng> (see GameBoard.__init__).
+        """
+        GameBoard.__init__(self, w, h, rng)
+        self._store = EntityStore(w, h)
+
+    def _new_grid(self) -> List[bytearray]:
+        """Return one row of empty tiles per row of this board."""
+        return [bytearray(b'-' * self.width) for _ in range(self.height)]
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>)."""
+        self._grid[y][x] = ord(code)
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board.
+        """
+        width = self.width
+        self._grid = [bytearray(tiles[y * width:(y + 1) * width])
+                      for y in range(self.height)]
+
+    def _tile_code(self, x: int, y: int) -> str:
+        """Return the tile code of tile (<x>, <y>), worked out from the
+        characters on it, stored or not.
+        """
+        code = GameBoard._tile_code(self, x, y)
+        i = self._store.id_at(x, y)
+        if i < 0:
+            return code
+        elif code == '-':
+            return self._store.code(i)
+        return '@'  # a Raccoon in a stored garbage can
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return b''.join(self._grid)
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        Precondition:
+        self.on_board(x, y)
+        """
+        return chr(self._grid[y][x])
+
+    def to_grid(self) -> List[List[chr]]:
+        """Return the game state as a list of lists of chrs (letters), in the
+        format described in GameBoard.to_grid.
+
+        >>> b = CompactGameBoard(1, 1)
+        >>> b.setup_from_grid('P--\\n-@C')
+        >>> b.to_grid()
+        [['P', '-', '-'], ['-', '@', 'C']]
+        """
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [list(row.decode('ascii')) for row in self._grid]
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board, as in
+        GameBoard.iter_rows.
+        """
+        for row in self._grid:
+            yield row.decode('ascii')
+
+    def __str__(self) -> str:
+        """Return a string representation of this board, in the format
+        expected by setup_from_grid.
+        """
+        return b'\n'.join(self._grid).decode('ascii')
+
+    def place_character(self, c: Character) -> None:
+        """Record that character <c> is on this board.
+
+        A Raccoon that is placed on a stored open garbage can is inside it.
+        """
+        GameBoard.place_character(self, c)
+        if isinstance(c, Raccoon) and self.on_board(c.x, c.y) \
+                and self._store.id_at(c.x, c.y) >= 0:
+            c.inside_can = True
+
+    def update_position(self, c: Union[Character, StoredCharacter],
+                        old_x: int, old_y: int) -> None:
+        """Record that character <c> has moved from tile (<old_x>, <old_y>)
+        to tile (c.x, c.y).
+        """
+        if isinstance(c, StoredCharacter):
+            # the store already knows; only the tiles need redrawing, in the
+            # same order as in GameBoard.update_position
+            self.update_tile(c.x, c.y)
+            self.update_tile(old_x, old_y)
+        else:
+            GameBoard.update_position(self, c, old_x, old_y)
+
+    def at(self, x: int, y: int) -> List[Union[Character, StoredCharacter]]:
+        """Return the characters at tile (x, y), in the same order as
+        GameBoard.at, with a new handle for a stored character.
+
+        >>> b = CompactGameBoard(1, 1)
+        >>> b.setup_from_grid('P@')
+        >>> [c.get_char() for c in b.at(1, 0)]
+        ['O', '@']
+        """
+        chars = GameBoard.at(self, x, y)
+        if self.on_board(x, y):
+            i = self._store.id_at(x, y)
+            if i >= 0:
+                chars.insert(0, self._handle(i))
+        return chars
+
+    def char_type(self, x: int, y: int) -> str:
+        """Return the symbol of the first character at (x, y), as in
+        GameBoard.char_type.
+        """
+        return self.at(x, y)[0].get_char()
+
+    def _load_characters(self, tiles: bytes) -> None:
+        """Create the characters of this empty board from <tiles>, its tile
+        codes, which are already stored (see GameBoard._load_characters).
+
+        Garbage cans and recycling bins are kept in the store instead of
+        being created as objects.
+
+        >>> b = CompactGameBoard(1, 1)
+        >>> b.setup_from_grid('P-B-\\n-BRB\\n--BB\\n-C--')
+        >>> str(b)
+        'P-B-\\n-BRB\\n--BB\\n-C--'
+        >>> b.check_game_end()
+        13
+        """
+        width = self.width
+        store = self._store
+        for i, char in iter_occupied(tiles):
+            y, x = divmod(i, width)
+            if char in 'BOC@':
+                store.add(x, y, BIN if char == 'B' else CAN, char == 'C')
+                if char == '@':
+                    Raccoon(self, x, y)  # placed inside the stored can
+            elif char == 'R':
+                Raccoon(self, x, y)
+            elif char == 'S':
+                SmartRaccoon(self, x, y)
+            elif char == 'P':
+                Player(self, x, y)
+
+    def _handle(self, i: int) -> Union[StoredRecyclingBin, StoredGarbageCan]:
+        """Return a new handle to stored character <i>."""
+        if self._store.kinds[i] == BIN:
+            return StoredRecyclingBin(self, self._store, i)
+        return StoredGarbageCan(self, self._store, i)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -21,11 +21,16 @@ a1.py.
 """
 
 import sys
-from random import random, shuffle
+import time
 from typing import Dict, List, Optional
 
 import pygame
 import a1
+# The board dimensions, the number of each type of Character in a random game
+# and populate_board live in a1_sim, which can run games without pygame.
+from a1_sim import (BOARD_WIDTH, BOARD_HEIGHT, NUM_RACCOONS, NUM_GARBAGE_CANS,
+                    NUM_RECYCLING_BINS, populate_board)
+from a1_replay import ReplayLog
 
 # Feel free to modify any of these constant values.
 
@@ -33,26 +38,11 @@ import a1
 SCREEN_WIDTH = 1500  #
 SCREEN_HEIGHT = 600  # 733
 
-# Dimensions of the game board, in squares.
-BOARD_WIDTH = 10  # 20
-BOARD_HEIGHT = 10  # 15
-
-# Number of each type of Character to include in a random game
-NUM_RACCOONS = 4
-NUM_GARBAGE_CANS = 4
-NUM_RECYCLING_BINS = int(BOARD_HEIGHT * BOARD_WIDTH * 0.25)
-
 # Number of milliseconds to wait between iterations of the main game loop.
 # This changes the speed of the game. The main player can move at most
 # once every LOOP_DELAY milliseconds.
 LOOP_DELAY = 100
 
-# Fraction of garbage cans that are to be locked at the start of the game.
-FRACTION_LOCKED = 0.1
-
-# Fraction of "smart" raccoons
-FRACTION_SMART = 0.5
-
 # Character icons
 BACKGROUND_ICON = 'icons/background.png'
 GARBAGE_CAN_OPEN_ICON = 'icons/open.png'
@@ -150,31 +140,45 @@ class RaccoonRaiders:
         self._last_state = None
         self.height, self.width = self._board.height, self._board.width
 
+    def start_recording(self, seed: int) -> ReplayLog:
+        """Start recording this game, with the board's random generator
+        seeded with <seed>, and return the log it is recorded into (see
+        a1_replay).
+        """
+        return ReplayLog.start(self._board, seed)
+
     def draw(self) -> None:
         """
         Draw the given board state using pygame and also print it to the
         terminal in a text representation.
+
+        Only the tiles that changed since the last call are redrawn and pushed
+        to the display, and nothing at all is done if no tile changed.
         """
         state = self._board.to_grid()
-        changed = self._last_state != state
-        if changed:  # also print the board to the console, feel free to remove
-            print(f'\n{self._board}')
-        self._last_state = state
-
-        for x in range(len(state[0])):  # will fail until Task #1 is done
-            for y in range(len(state)):
-                c = state[y][x]
+        if self._last_state == state:
+            return
+        print()  # also print the board to the console, a row at a time
+        self._board.write_to(sys.stdout)
+
+        rects = []
+        for y, row in enumerate(state):  # will fail until Task #1 is done
+            for x, c in enumerate(row):
+                if self._last_state is not None and \
+                        self._last_state[y][x] == c:
+                    continue
                 rectangle = pygame.Rect(x * self.square_size,
                                         y * self.square_size,
                                         self.square_size, self.square_size)
                 # Draw the icon onto the rectangle.
-                self._screen.blit(self._background_tile, (x * self.square_size,
-                                                          y * self.square_size))
+                self._screen.blit(self._background_tile, rectangle)
                 if c in self._icon_map:
                     self._screen.blit(self._icon_map[c], rectangle)
+                rects.append(rectangle)
+        self._last_state = state
 
-        # Update the screen.
-        pygame.display.flip()
+        # Update the changed parts of the screen.
+        pygame.display.update(rects)
 
     def play(self) -> None:
         """
@@ -233,63 +237,6 @@ class RaccoonRaiders:
         self.draw()
 
 
-# this depends on your place_character method in the GameBoard class
-# in order to work, since
-# Character.__init__ relies on GameBoard.place_character!
-def populate_board(board: a1.GameBoard, num_raccoons: int,
-                   num_cans: int, num_bins: int) -> None:
-    """Place characters on this board.
-
-    The board will have one player at the top-left corner of the board,
-    and the given number of raccoons, garbage cans and recycling bins
-    all at random, not already occupied, locations on the board.
-
-    FRACTION_LOCKED and FRACTION_SMART dictate the probability that
-    each GarbageCan is locked and
-    each Raccoon is a SmartRaccoon, respectively.
-
-     Precondition:
-        - num_raccoons >= 0
-        - num_cans >= 0
-        - num_bins >= 0
-        - num_raccoons + num_bins + num_cans + 1 <= number of locations
-          on the board!
-        - board is initially empty
-
-    >>> b = a1.GameBoard(3, 1)
-    >>> populate_board(b,1,0,1)
-    >>> str(b) in ['PRB', 'PBR', 'PSB', 'PBS']
-    True
-    """
-    a1.Player(board, 0, 0)
-
-    # get the set of all possible locations on the board and
-    # randomly place characters in them.
-    availables = []
-    for i in range(board.width):
-        for j in range(board.height):
-            availables.append((i, j))
-    availables.remove((0, 0))
-
-    shuffle(availables)
-
-    for _ in range(num_raccoons):
-        x, y = availables.pop()
-        if random() <= FRACTION_SMART:
-            a1.SmartRaccoon(board, x, y)
-        else:
-            a1.Raccoon(board, x, y)
-
-    for _ in range(num_cans):
-        x, y = availables.pop()
-        locked = random() <= FRACTION_LOCKED
-        a1.GarbageCan(board, x, y, locked)
-
-    for _ in range(num_bins):
-        x, y = availables.pop()
-        a1.RecyclingBin(board, x, y)
-
-
 if __name__ == '__main__':
     random_game = True  # set to True to play on a random board
     if random_game:
@@ -306,4 +253,13 @@ if __name__ == '__main__':
         # game_string = "R-P-B-BB--O "
         # rc = RaccoonRaiders(len(game_string), 1, game_string)
 
-    rc.play()
+    # python a1_game.py game.log records the game into game.log, which
+    # python a1_replay.py game.log replays
+    replay_log = None
+    if len(sys.argv) > 1:
+        replay_log = rc.start_recording(time.time_ns())
+    try:
+        rc.play()
+    finally:  # play only ends when the window is closed
+        if replay_log is not None:
+            replay_log.save(sys.argv[1])
@@ -0,0 +1,220 @@
+"""A1: Grids of tile codes of a Raccoon Raiders board
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains the code that reads, stores and writes the tile codes of
+a GameBoard in bulk: read_grid, which checks a grid given to
+GameBoard.setup_from_grid and turns it into one byte per tile,
+iter_occupied, which finds the tiles of such bytes that are not empty, and
+TileGrid, the part of GameBoard that stores its tile codes.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import AnyStr, Iterable, Iterator, List, TextIO, Tuple, Union
+
+# Matches a tile that is not empty. A pattern that starts with a set of bytes
+# is searched for with a scan in C, so the empty tiles between matches are
+# skipped in linear time (a pattern that also matched the empty tiles before
+# a tile would rescan a run of empty tiles with no tile after it from every
+# one of its positions).
+OCCUPIED = re.compile(rb'[^-]')
+
+# The tile codes that setup_from_grid understands
+_TILE_CODES = b'-RSPOCB@'
+
+
+def read_grid(grid: Union[str, Iterable[AnyStr]]) -> Tuple[int, int, bytes]:
+    """Return the width, the height and the tile codes (row by row, without
+    newlines) of <grid>, a board in the format of GameBoard.setup_from_grid
+    or an iterable of its rows.
+
+    The board is as wide as the first row of <grid>, and rows that are
+    shorter are padded with empty tiles. One newline at the end of a str
+    <grid> is ignored, as is the newline at the end of each row of an
+    iterable.
+
+    Raise ValueError if a row of <grid> is longer than its first row, or it
+    has a tile code that setup_from_grid does not understand.
+
+    >>> read_grid('P-B\\n-RC')
+    (3, 2, b'P-B-RC')
+    >>> read_grid('P-B\\n-R\\n')
+    (3, 2, b'P-B-R-')
+    >>> read_grid(iter([b'P-B\\r\\n', b'-RC\\n']))
+    (3, 2, b'P-B-RC')
+    >>> read_grid('P-B\\n-RX')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown tile code 'X'
+    """
+    if isinstance(grid, str):
+        data = grid.encode('ascii')
+        if data.endswith(b'\n'):
+            data = data[:-1]
+    else:
+        data = b'\n'.join(
+            (row if isinstance(row, bytes) else row.encode('ascii'))
+            .rstrip(b'\r\n') for row in grid)
+    width = data.find(b'\n')
+    if width < 0:
+        width = len(data)
+    height = data.count(b'\n') + 1
+    if len(data) != height * (width + 1) - 1 \
+            or data[width::width + 1] != b'\n' * (height - 1):
+        rows = data.split(b'\n')
+        if max(map(len, rows)) > width:
+            raise ValueError('a row of the grid is longer than its first row')
+        data = b'\n'.join(row.ljust(width, b'-') for row in rows)
+    tiles = data.replace(b'\n', b'')
+    unknown = tiles.translate(None, _TILE_CODES)
+    if unknown:
+        raise ValueError(f'unknown tile code {chr(unknown[0])!r}')
+    return width, height, tiles
+
+
+def iter_occupied(tiles: bytes) -> Iterator[Tuple[int, str]]:
+    """Yield (i, code) for each tile code <code> in <tiles>, tile codes as
+    ASCII bytes, that is not an empty tile ('-'), where <i> is its index in
+    <tiles>.
+
+    Runs of empty tiles are skipped in C, so this is fast on tile codes that
+    are mostly empty.
+
+    >>> list(iter_occupied(b'P--B-R'))
+    [(0, 'P'), (3, 'B'), (5, 'R')]
+    """
+    for match in OCCUPIED.finditer(tiles):
+        yield match.start(), chr(match.group()[0])
+
+
+class TileGrid:
+    """The tile codes of a board, in the format of GameBoard.to_grid, which
+    are kept up to date as the characters on its tiles change.
+
+    This class is the part of GameBoard that stores tile codes, and should
+    not be directly instantiated. Subclasses of GameBoard that store tile
+    codes differently override its methods.
+    """
+    # === Private Attributes ===
+    # _grid: the tile codes of the board in the same format as to_grid(),
+    #   patched in place whenever a tile's contents change
+    width: int
+    height: int
+    _grid: List[List[str]]
+
+    def _new_grid(self) -> List[List[str]]:
+        """Return the storage for the tile codes of an empty board of this
+        board's width and height.
+
+        Subclasses that store tile codes differently override this method
+        together with _write_tile, _load_tiles, tile_at, _tile_bytes, to_grid,
+        iter_rows and __str__.
+        """
+        return [['-'] * self.width for _ in range(self.height)]
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>)."""
+        self._grid[y][x] = code
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board.
+        """
+        text = tiles.decode('ascii')
+        width = self.width
+        self._grid = [list(text[y * width:(y + 1) * width])
+                      for y in range(self.height)]
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return ''.join(map(''.join, self._grid)).encode('ascii')
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        This is the cheap way to look at a single tile: it does not build
+        the whole grid.
+
+        Precondition:
+        self.on_board(x, y)
+
+        >>> from a1 import GameBoard, Raccoon
+        >>> b = GameBoard(3, 2)
+        >>> _ = Raccoon(b, 1, 1)
+        >>> b.tile_at(1, 1)
+        'R'
+        >>> b.tile_at(0, 0)
+        '-'
+        """
+        return self._grid[y][x]
+
+    def occupied_tiles(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (x, y, tile code) for every tile of this board that is not
+        empty, row by row.
+
+        Empty tiles are skipped in C, so this is much faster than looking at
+        every tile of to_grid() on a board that is mostly empty. Subclasses
+        that do not store empty parts of the board override it to skip them
+        altogether.
+
+        >>> from a1 import GameBoard
+        >>> b = GameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RO')
+        >>> list(b.occupied_tiles())
+        [(0, 0, 'P'), (1, 1, 'R'), (2, 1, 'O')]
+        """
+        width = self.width
+        for i, code in iter_occupied(self._tile_bytes()):
+            yield i % width, i // width, code
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board (see
+        __str__), from top to bottom and without newlines.
+
+        Only one row is built at a time, so a large board can be logged or
+        saved without building its whole string or grid.
+
+        Subclasses that store tile codes differently override this method.
+
+        >>> from a1 import GameBoard, Raccoon
+        >>> b = GameBoard(3, 2)
+        >>> _ = Raccoon(b, 1, 1)
+        >>> list(b.iter_rows())
+        ['---', '-R-']
+        """
+        for row in self._grid:
+            yield ''.join(row)
+
+    def write_to(self, file: TextIO) -> None:
+        """Write the string representation of this board (see __str__) to the
+        text file <file>, one row at a time, ending each row with a newline.
+
+        The rows that are written can be read back with setup_from_grid.
+
+        >>> import io
+        >>> from a1 import GameBoard, Player
+        >>> b = GameBoard(3, 2)
+        >>> _ = Player(b, 0, 1)
+        >>> out = io.StringIO()
+        >>> b.write_to(out)
+        >>> out.getvalue()
+        '---\\nP--\\n'
+        """
+        for row in self.iter_rows():
+            file.write(row)
+            file.write('\n')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
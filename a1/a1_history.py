@@ -0,0 +1,205 @@
+"""A1: Snapshots and recordings of a Raccoon Raiders game
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains what a GameBoard keeps of its past: BoardHistory, the
+trail of changes to its characters and the events of its game, and
+RecordingBoard, the part of GameBoard that takes snapshots of the board,
+rolls it back to them and records its events (see a1_replay).
+"""
+
+from __future__ import annotations
+
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class BoardSnapshot(NamedTuple):
+    """A snapshot of a GameBoard's state, taken by GameBoard.snapshot.
+
+    === Public Attributes ===
+    changes:
+        the number of changes in the board's trail when it was taken
+    turns:
+        the board's turns when it was taken
+    ended:
+        the board's ended when it was taken
+    """
+    changes: int
+    turns: int
+    ended: bool
+
+
+class BoardHistory:
+    """What a GameBoard keeps of its past: the trail of changes that its
+    snapshots are restored from, and the events of the game it is recording.
+
+    === Public Attributes ===
+    trail:
+        the changes made to characters since the first snapshot was taken,
+        as (character, attribute, old value) in the order they were made, or
+        None if no snapshot has been taken
+    events:
+        the bytearray that the code of the event of each tick is appended
+        to, or None if the board is not being recorded
+    pending:
+        the code of the last event handled since the last tick, or 0 if
+        there was none. It is kept even when the board is not being
+        recorded, so that an event handled just before the recording starts
+        is recorded in the first tick.
+
+    === Sample Usage ===
+    >>> history = BoardHistory()
+    >>> history.events = bytearray()
+    >>> history.record_event(3)
+    >>> history.end_tick()
+    >>> history.end_tick()
+    >>> history.events
+    bytearray(b'\\x03\\x00')
+    """
+    trail: Optional[List[Tuple[object, str, object]]]
+    events: Optional[bytearray]
+    pending: int
+
+    def __init__(self) -> None:
+        """Initialize the history of a board that has no snapshots and is not
+        being recorded.
+        """
+        self.trail = None
+        self.events = None
+        self.pending = 0
+
+    def record_event(self, code: int) -> None:
+        """Record that the event with code <code> was handled (see
+        RecordingBoard.start_recording).
+        """
+        self.pending = code
+
+    def end_tick(self) -> None:
+        """Record that a tick is over, appending its event code to events if
+        the board is being recorded.
+        """
+        if self.events is not None:
+            self.events.append(self.pending)
+        self.pending = 0
+
+
+class RecordingBoard:
+    """The snapshot, restore and recording methods of a GameBoard.
+
+    This class is a mixin for GameBoard, and should not be directly
+    instantiated.
+    """
+    # === Private Attributes ===
+    # _history: the trail of changes behind snapshot and restore, and the
+    #   events recorded since start_recording
+    turns: int
+    ended: bool
+    _history: BoardHistory
+
+    def start_recording(self, events: bytearray) -> None:
+        """Start recording the events of this board's game, by appending one
+        byte to <events> for each call to give_turns: 0 if handle_event was
+        not called since the previous call to give_turns, or else one more
+        than the index in DIRECTIONS of the last event that was handled.
+
+        Together with the state of the board (including its turn_order) and
+        of its random generator when recording starts, these bytes determine
+        how the game plays out (see a1_replay).
+
+        >>> from a1 import GameBoard, LEFT, RIGHT
+        >>> b = GameBoard(3, 1)
+        >>> b.setup_from_grid('P--')
+        >>> events = bytearray()
+        >>> b.start_recording(events)
+        >>> b.handle_event(LEFT)
+        >>> b.handle_event(RIGHT)
+        >>> b.give_turns()
+        >>> b.give_turns()
+        >>> events
+        bytearray(b'\\x03\\x00')
+        """
+        self._history.events = events
+
+    def stop_recording(self) -> None:
+        """Stop recording the events of this board's game."""
+        self._history.events = None
+
+    def record_change(self, c: object, attribute: str, old: object) -> None:
+        """Record that the attribute named <attribute> of character <c> has
+        just been changed from <old>, so that restore can undo the change.
+
+        This method should only be called from the setters of Character
+        attributes (x, y, inside_can and locked).
+        """
+        if self._history.trail is not None:
+            self._history.trail.append((c, attribute, old))
+
+    def snapshot(self) -> BoardSnapshot:
+        """Return a snapshot of the state of this board that restore can
+        roll the board back to.
+
+        Taking a snapshot takes O(1) time: from the first snapshot on, this
+        board keeps a trail of every change to a character's position,
+        inside_can or locked attribute, and a snapshot is just the length of
+        that trail together with turns and ended.
+
+        >>> from a1 import GameBoard, RIGHT, DOWN
+        >>> b = GameBoard(3, 2)
+        >>> b.setup_from_grid('PB-\\n-O-')
+        >>> start = b.snapshot()
+        >>> b.handle_event(RIGHT)
+        >>> b.give_turns()
+        >>> b.handle_event(DOWN)
+        >>> b.give_turns()
+        >>> print(b)
+        -PB
+        -C-
+        >>> b.restore(start)
+        >>> print(b)
+        PB-
+        -O-
+        >>> b.turns
+        0
+        """
+        if self._history.trail is None:
+            self._history.trail = []
+        return BoardSnapshot(len(self._history.trail), self.turns, self.ended)
+
+    def restore(self, snapshot: BoardSnapshot) -> None:
+        """Roll this board back to the state it was in when <snapshot> was
+        taken, by undoing the changes made since then, latest first. This
+        takes O(number of changes) time.
+
+        Snapshots work like a stack: restoring a snapshot invalidates every
+        snapshot taken after it, but not the ones taken before it.
+
+        Preconditions:
+        - <snapshot> was taken from this board and has not been invalidated
+        - no character has been placed on this board since <snapshot> was
+          taken, and setup_from_grid has not been called
+        """
+        trail = self._history.trail
+        self._history.trail = None  # undoing a change is not a change to record
+        while len(trail) > snapshot.changes:
+            c, attribute, old = trail.pop()
+            setattr(c, attribute, old)
+        self._history.trail = trail
+        self.turns = snapshot.turns
+        self.ended = snapshot.ended
+
+    def clear_snapshots(self) -> None:
+        """Stop keeping the trail of changes, which invalidates every
+        snapshot of this board taken so far.
+        """
+        self._history.trail = None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
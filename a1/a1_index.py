@@ -0,0 +1,747 @@
+"""A1: Incremental indexes of a Raccoon Raiders board
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains the indexes that a GameBoard builds the first time one
+of its whole-board queries is asked, and then keeps up to date as tiles
+change so that later queries are cheap: BinClusters (for
+GameBoard.adjacent_bin_score), SightLines (sight_distance), ZobristHash
+(zobrist_hash) and TrappedRaccoons (check_game_end). A board keeps them in
+a BoardIndexes, which passes every change of a tile on to the indexes that
+have been built. IndexedBoard is the part of GameBoard that builds them and
+answers those queries.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Mask that keeps the low 64 bits of an int
+_MASK64 = (1 << 64) - 1
+
+# Translation table that maps the byte of a recycling bin tile ('B') to 1 and
+# every other byte to 0
+_BIN_TABLE = bytes(int(i == ord('B')) for i in range(256))
+
+
+class BoardIndexes:
+    """The incremental indexes of a board, each of which is None until the
+    board first needs it.
+
+    The board calls update whenever the tile code of one of its tiles
+    changes, and every index that has been built is kept up to date.
+
+    === Public Attributes ===
+    clusters:
+        the clusters of adjacent recycling bins, or None
+    sight:
+        the open cans and line of sight blockers in each row and column, or
+        None
+    zobrist:
+        the Zobrist hash of the tile codes, or None
+    raccoons:
+        the raccoons outside garbage cans and which of them are trapped, or
+        None
+
+    === Sample Usage ===
+    >>> indexes = BoardIndexes()
+    >>> indexes.update(0, 0, '-', 'B')  # nothing has been built yet
+    >>> indexes.clusters = BinClusters(2, 1, bytearray([1, 0]))
+    >>> indexes.update(1, 0, '-', 'B')
+    >>> indexes.clusters.largest
+    2
+    """
+    clusters: Optional[BinClusters]
+    sight: Optional[SightLines]
+    zobrist: Optional[ZobristHash]
+    raccoons: Optional[TrappedRaccoons]
+
+    def __init__(self) -> None:
+        """Initialize indexes that have not been built yet."""
+        self.clusters = None
+        self.sight = None
+        self.zobrist = None
+        self.raccoons = None
+
+    def update(self, x: int, y: int, old: str, new: str) -> None:
+        """Record that the tile code of tile (<x>, <y>) changed from <old> to
+        <new>.
+        """
+        if old == new:
+            return
+        if self.clusters is not None:
+            if new == 'B':
+                self.clusters.add(x, y)
+            elif old == 'B':
+                self.clusters.remove(x, y)
+        if self.sight is not None:
+            self.sight.update(x, y, old, new)
+        if self.zobrist is not None:
+            self.zobrist.update(x, y, old, new)
+        if self.raccoons is not None:
+            self.raccoons.update(x, y, old, new)
+
+
+class IndexedBoard:
+    """The whole-board queries of a GameBoard, which are answered from its
+    BoardIndexes.
+
+    This class is a mixin for GameBoard, and should not be directly
+    instantiated.
+    """
+    # === Private Attributes ===
+    # _indexes: the indexes behind adjacent_bin_score, sight_distance,
+    #   zobrist_hash and check_game_end, each built by the first call to its
+    #   method and kept up to date by update_tile from then on
+    ended: bool
+    width: int
+    height: int
+    _indexes: BoardIndexes
+
+    def check_game_end(self) -> Optional[int]:
+        """Check if this game has ended. A game ends when all the raccoons on
+        this game board are either inside a can or trapped.
+
+        If the game has ended:
+        - update the ended attribute to be True
+        - Return the score, where the score is given by:
+            (number of raccoons trapped) * 10 + the adjacent_bin_score
+        If the game has not ended:
+        - update the ended attribute to be False
+        - return None
+
+        The first call finds the raccoons in O(width * height) time. After
+        that only the raccoons on and beside tiles that changed are checked
+        again (see TrappedRaccoons), so a call takes time proportional to the
+        number of tiles changed since the last call.
+
+        >>> from a1 import GameBoard, Player, Raccoon, RecyclingBin
+        >>> b = GameBoard(3, 2)
+        >>> _ = Raccoon(b, 1, 0)
+        >>> _ = Player(b, 0, 0)
+        >>> _ = RecyclingBin(b, 1, 1)
+        >>> b.check_game_end() is None
+        True
+        >>> b.ended
+        False
+        >>> _ = RecyclingBin(b, 2, 0)
+        >>> b.check_game_end()
+        11
+        >>> b.ended
+        True
+        """
+        indexes = self._indexes
+        if indexes.raccoons is None:
+            indexes.raccoons = TrappedRaccoons(self.width, self.height,
+                                               self.occupied_tiles())
+        trapped, outside = indexes.raccoons.count(self.tile_at)
+        if trapped == outside:
+            self.ended = True
+            return trapped * 10 + self.adjacent_bin_score()
+        else:
+            return None
+
+    def adjacent_bin_score(self) -> int:
+        """
+        Return the size of the largest cluster of adjacent recycling bins
+        on this board.
+
+        Two recycling bins are adjacent when they are directly beside each other
+        in one of the four directions (up, down, left, right).
+
+        The first call labels the clusters with one O(width * height) flood
+        fill. After that the clusters are kept up to date as bins are placed
+        and pushed, so later calls take O(1) time.
+
+        >>> from a1 import GameBoard, RecyclingBin
+        >>> b = GameBoard(3, 3)
+        >>> _ = RecyclingBin(b, 1, 1)
+        >>> _ = RecyclingBin(b, 0, 0)
+        >>> _ = RecyclingBin(b, 2, 2)
+        >>> print(b)
+        B--
+        -B-
+        --B
+        >>> b.adjacent_bin_score()
+        1
+        >>> _ = RecyclingBin(b, 2, 1)
+        >>> print(b)
+        B--
+        -BB
+        --B
+        >>> b.adjacent_bin_score()
+        3
+        >>> _ = RecyclingBin(b, 0, 1)
+        >>> print(b)
+        B--
+        BBB
+        --B
+        >>> b.adjacent_bin_score()
+        5
+        """
+        indexes = self._indexes
+        if indexes.clusters is None:
+            # one byte per tile, 1 for a recycling bin
+            bins = bytearray(self._tile_bytes()).translate(_BIN_TABLE)
+            indexes.clusters = BinClusters(self.width, self.height, bins)
+        return max(1, indexes.clusters.largest)
+
+    def sight_distance(self, x: int, y: int,
+                       direction: Tuple[int, int]) -> int:
+        """Return how many tiles away from tile (<x>, <y>) the closest open
+        GarbageCan in <direction> is, or 0 if there is no open GarbageCan in
+        that direction or a Raccoon, RecyclingBin or closed GarbageCan is in
+        the way. The Player and SmartRaccoons do not block the way.
+
+        The first call indexes the open cans and blockers of every row and
+        column in O(width * height) time. After that the indexes are kept up
+        to date as tiles change, and each call is a binary search.
+
+        Precondition:
+        direction in DIRECTIONS
+
+        >>> from a1 import GameBoard, DOWN, LEFT, RIGHT
+        >>> b = GameBoard(5, 2)
+        >>> b.setup_from_grid('O-SB-\\n-O--O')
+        >>> b.sight_distance(2, 0, LEFT), b.sight_distance(2, 0, RIGHT)
+        (2, 0)
+        >>> b.sight_distance(4, 0, DOWN)
+        1
+        """
+        indexes = self._indexes
+        if indexes.sight is None:
+            indexes.sight = SightLines(self.occupied_tiles())
+        return indexes.sight.distance(x, y, direction)
+
+    def zobrist_hash(self) -> int:
+        """Return a 64-bit hash of the tile codes of this board, which is the
+        same for any two boards of the same width with the same tile codes.
+
+        The first call hashes every tile in O(width * height) time. After
+        that the hash is kept up to date as tiles change (see ZobristHash),
+        and each call takes O(1) time.
+
+        >>> from a1 import GameBoard, RIGHT
+        >>> b = GameBoard(3, 1)
+        >>> b.setup_from_grid('PB-')
+        >>> start = b.zobrist_hash()
+        >>> b.handle_event(RIGHT)
+        >>> b.give_turns()
+        >>> b.zobrist_hash() == start
+        False
+        >>> other = GameBoard(3, 1)
+        >>> other.setup_from_grid('-PB')
+        >>> b.zobrist_hash() == other.zobrist_hash()
+        True
+        """
+        indexes = self._indexes
+        if indexes.zobrist is None:
+            indexes.zobrist = ZobristHash(self.width, self.occupied_tiles())
+        return indexes.zobrist.value
+
+
+class BinClusters:
+    """The clusters of adjacent recycling bins on a board, kept up to date as
+    bins are added, removed and moved so that the size of the largest cluster
+    can be read at any time.
+
+    Tiles are identified by their flat index y * width + x.
+
+    === Public Attributes ===
+    largest:
+        the number of bins in the largest cluster, or 0 if there are no bins
+
+    === Sample Usage ===
+    >>> c = BinClusters(3, 2, bytearray([1, 0, 1,
+    ...                                  1, 0, 0]))
+    >>> c.largest
+    2
+    >>> c.add(1, 0)
+    >>> c.largest
+    4
+    >>> c.remove(1, 0)
+    >>> c.largest
+    2
+    >>> c.move(2, 0, 2, 1)
+    >>> c.largest
+    2
+    """
+    # === Private Attributes ===
+    # _width:
+    #   the width of the board
+    # _size:
+    #   the number of tiles on the board
+    # _cluster_of:
+    #   a mapping from the flat index of each bin to the id of its cluster
+    # _members:
+    #   a mapping from each cluster id to the flat indices of its bins
+    # _size_count:
+    #   a mapping from each cluster size to how many clusters have that size
+    # _next_id:
+    #   the id to give to the next new cluster
+    largest: int
+    _width: int
+    _size: int
+    _cluster_of: Dict[int, int]
+    _members: Dict[int, Set[int]]
+    _size_count: Dict[int, int]
+    _next_id: int
+
+    def __init__(self, width: int, height: int, bins: bytearray) -> None:
+        """Initialize the clusters of a <width> by <height> board, where
+        <bins> has one byte per tile that is 1 iff that tile holds a
+        recycling bin, or is empty if the bins will all be added with add.
+
+        The clusters are labelled with one flood fill over <bins>, which
+        takes O(width * height) time.
+        """
+        self.largest = 0
+        self._width = width
+        self._size = width * height
+        self._cluster_of = {}
+        self._members = {}
+        self._size_count = {}
+        self._next_id = 0
+        todo = bytearray(bins)
+        start = todo.find(1)
+        while start != -1:
+            # flood fill the cluster containing start with an explicit stack,
+            # clearing each bin's byte when it is first reached
+            todo[start] = 0
+            stack = [start]
+            members = set()
+            while stack:
+                i = stack.pop()
+                members.add(i)
+                if i % width and todo[i - 1]:
+                    todo[i - 1] = 0
+                    stack.append(i - 1)
+                if (i + 1) % width and todo[i + 1]:
+                    todo[i + 1] = 0
+                    stack.append(i + 1)
+                if i >= width and todo[i - width]:
+                    todo[i - width] = 0
+                    stack.append(i - width)
+                if i + width < self._size and todo[i + width]:
+                    todo[i + width] = 0
+                    stack.append(i + width)
+            self._new_cluster(members)
+            start = todo.find(1, start + 1)
+
+    def add(self, x: int, y: int) -> None:
+        """Record that a recycling bin is now on tile (<x>, <y>), merging the
+        clusters it joins together.
+
+        The bins of the smaller clusters are relabelled into the largest one,
+        so a bin is relabelled at most O(log n) times over many merges.
+        """
+        i = y * self._width + x
+        ids = {self._cluster_of[j] for j in self._adjacent(i)
+               if j in self._cluster_of}
+        if not ids:
+            self._new_cluster({i})
+            return
+        target = max(ids, key=lambda cid: len(self._members[cid]))
+        members = self._members[target]
+        old_sizes = [len(members)]
+        for cid in ids - {target}:
+            other = self._members.pop(cid)
+            old_sizes.append(len(other))
+            for j in other:
+                self._cluster_of[j] = target
+            members.update(other)
+        self._cluster_of[i] = target
+        members.add(i)
+        # the new size is recorded before the old ones are forgotten, so
+        # that largest does not have to be searched for again
+        self._record_size(len(members))
+        for size in old_sizes:
+            self._forget_size(size)
+
+    def remove(self, x: int, y: int) -> None:
+        """Record that the recycling bin on tile (<x>, <y>) is gone, splitting
+        its cluster if that bin was the only link between parts of it.
+
+        A search is started from each bin that was next to the removed bin,
+        and the searches take turns taking one step each. Searches that meet
+        are joined, and a group of searches that runs out of bins before
+        meeting the others has found a separate cluster. Only the pieces
+        that split off are fully visited, never the largest remaining one.
+        """
+        i = y * self._width + x
+        cid = self._cluster_of.pop(i)
+        members = self._members[cid]
+        old_size = len(members)
+        members.remove(i)
+        starts = [j for j in self._adjacent(i) if j in self._cluster_of]
+        if not members:
+            del self._members[cid]
+        else:
+            if len(starts) > 1:
+                self._split(starts)
+            self._record_size(len(members))
+        self._forget_size(old_size)
+
+    def move(self, old_x: int, old_y: int, x: int, y: int) -> None:
+        """Record that the recycling bin on tile (<old_x>, <old_y>) moved to
+        tile (<x>, <y>).
+        """
+        self.add(x, y)
+        self.remove(old_x, old_y)
+
+    def _adjacent(self, i: int) -> List[int]:
+        """Return the flat indices of the tiles on the board that are next to
+        the tile with flat index <i>.
+        """
+        width = self._width
+        adjacent = []
+        if i % width:
+            adjacent.append(i - 1)
+        if i >= width:
+            adjacent.append(i - width)
+        if (i + 1) % width:
+            adjacent.append(i + 1)
+        if i + width < self._size:
+            adjacent.append(i + width)
+        return adjacent
+
+    def _split(self, starts: List[int]) -> None:
+        """Move every piece of the cluster containing <starts> that is no
+        longer connected to the rest of it into a cluster of its own.
+
+        Precondition:
+        - all of <starts> are in the same cluster, which has just lost a bin
+        """
+        group = list(range(len(starts)))  # the search each search joined
+        found = {j: k for k, j in enumerate(starts)}
+        stacks = [[j] for j in starts]
+        visited = [[j] for j in starts]
+        remaining = set(group)
+        while len(remaining) > 1:
+            for k, stack in enumerate(stacks):
+                if not stack:
+                    continue
+                for j in self._adjacent(stack.pop()):
+                    if j not in self._cluster_of:
+                        continue
+                    other = found.get(j)
+                    if other is None:
+                        found[j] = k
+                        stack.append(j)
+                        visited[k].append(j)
+                    elif group[other] != group[k]:
+                        # the searches met, so they are in the same piece
+                        old, new = group[other], group[k]
+                        group = [new if g == old else g for g in group]
+                        remaining.discard(old)
+            for g in list(remaining):
+                searches = [k for k in range(len(starts)) if group[k] == g]
+                if len(remaining) > 1 and \
+                        not any(stacks[k] for k in searches):
+                    piece = set()
+                    for k in searches:
+                        piece.update(visited[k])
+                    self._split_off(piece)
+                    remaining.discard(g)
+
+    def _split_off(self, piece: Set[int]) -> None:
+        """Move the bins in <piece> out of their cluster into a new one."""
+        members = self._members[self._cluster_of[next(iter(piece))]]
+        members.difference_update(piece)
+        self._new_cluster(piece)
+
+    def _new_cluster(self, members: Set[int]) -> None:
+        """Make a new cluster out of the bins in <members>."""
+        cid = self._next_id
+        self._next_id += 1
+        self._members[cid] = members
+        for i in members:
+            self._cluster_of[i] = cid
+        self._record_size(len(members))
+
+    def _record_size(self, size: int) -> None:
+        """Record that there is one more cluster of <size> bins."""
+        self._size_count[size] = self._size_count.get(size, 0) + 1
+        self.largest = max(self.largest, size)
+
+    def _forget_size(self, size: int) -> None:
+        """Record that there is one less cluster of <size> bins.
+
+        If that was the only cluster of the largest size, the next largest
+        size is found among the sizes of the clusters, of which there are
+        O(sqrt(number of bins)) different ones.
+        """
+        self._size_count[size] -= 1
+        if not self._size_count[size]:
+            del self._size_count[size]
+            if size == self.largest:
+                self.largest = max(self._size_count, default=0)
+
+
+class SightLines:
+    """Sorted indexes of the open garbage cans and of the tiles that block a
+    SmartRaccoon's line of sight in every row and column of a board, so that
+    the closest open GarbageCan a SmartRaccoon can see in each direction is
+    found with a binary search.
+
+    A tile blocks the line of sight if it holds a Raccoon (including one in a
+    garbage can), a RecyclingBin or a closed GarbageCan. The Player and
+    SmartRaccoons do not block it.
+
+    === Sample Usage ===
+    >>> from a1 import GameBoard, LEFT, RIGHT, UP
+    >>> b = GameBoard(1, 1)
+    >>> b.setup_from_grid('O-S-R-O\\n-------')
+    >>> s = SightLines(b.occupied_tiles())
+    >>> s.distance(2, 0, LEFT), s.distance(2, 0, RIGHT)
+    (2, 0)
+    >>> s.update(4, 0, 'R', '-')
+    >>> s.distance(2, 0, RIGHT)
+    4
+    >>> s.distance(6, 1, UP)
+    1
+    """
+    # === Private Attributes ===
+    # _row_cans, _row_blocks:
+    #   for each row y that has had any, the sorted x coordinates of the open
+    #   cans and of the blocking tiles in that row
+    # _col_cans, _col_blocks:
+    #   for each column x that has had any, the sorted y coordinates of the
+    #   open cans and of the blocking tiles in that column
+    _row_cans: Dict[int, List[int]]
+    _row_blocks: Dict[int, List[int]]
+    _col_cans: Dict[int, List[int]]
+    _col_blocks: Dict[int, List[int]]
+
+    def __init__(self, tiles: Iterable[Tuple[int, int, str]]) -> None:
+        """Initialize the indexes of a board whose tiles that are not empty
+        are <tiles>, as (x, y, tile code) in the order of
+        GameBoard.occupied_tiles.
+        """
+        self._row_cans = {}
+        self._row_blocks = {}
+        self._col_cans = {}
+        self._col_blocks = {}
+        for x, y, code in tiles:
+            if code not in 'P-S':
+                self._add(x, y, code == 'O')
+
+    def update(self, x: int, y: int, old: str, new: str) -> None:
+        """Record that the tile code of tile (<x>, <y>) changed from <old> to
+        <new>.
+        """
+        old_kind = None if old in 'P-S' else old == 'O'
+        new_kind = None if new in 'P-S' else new == 'O'
+        if old_kind != new_kind:
+            if old_kind is not None:
+                row = self._row_cans[y] if old_kind else self._row_blocks[y]
+                col = self._col_cans[x] if old_kind else self._col_blocks[x]
+                del row[bisect_left(row, x)]
+                del col[bisect_left(col, y)]
+            if new_kind is not None:
+                self._add(x, y, new_kind)
+
+    def distance(self, x: int, y: int, direction: Tuple[int, int]) -> int:
+        """Return how many tiles away from tile (<x>, <y>) the closest open
+        GarbageCan in <direction> is, or 0 if no open GarbageCan can be seen
+        from tile (<x>, <y>) in that direction.
+
+        Precondition:
+        direction in a1.DIRECTIONS
+        """
+        if direction[0]:
+            pos, cans = x, self._row_cans.get(y, ())
+            blocks = self._row_blocks.get(y, ())
+        else:
+            pos, cans = y, self._col_cans.get(x, ())
+            blocks = self._col_blocks.get(x, ())
+        if direction[0] + direction[1] < 0:
+            i = bisect_left(cans, pos)
+            j = bisect_left(blocks, pos)
+            if i and not (j and blocks[j - 1] > cans[i - 1]):
+                return pos - cans[i - 1]
+        else:
+            i = bisect_right(cans, pos)
+            j = bisect_right(blocks, pos)
+            if i < len(cans) and not (j < len(blocks)
+                                      and blocks[j] < cans[i]):
+                return cans[i] - pos
+        return 0
+
+    def _add(self, x: int, y: int, can: bool) -> None:
+        """Add tile (<x>, <y>) to the indexes of open cans if <can>, or else
+        to the indexes of blocking tiles.
+        """
+        if can:
+            insort(self._row_cans.setdefault(y, []), x)
+            insort(self._col_cans.setdefault(x, []), y)
+        else:
+            insort(self._row_blocks.setdefault(y, []), x)
+            insort(self._col_blocks.setdefault(x, []), y)
+
+
+class ZobristHash:
+    """A Zobrist hash of the tile codes of a board, kept up to date as tiles
+    change, so that two board states with the same tile codes have the same
+    hash without comparing whole boards.
+
+    The hash is the XOR of one pseudo-random 64-bit key for each tile that is
+    not empty, which depends on the tile's position and code. Keys are
+    computed when needed (with the splitmix64 mixing function), so no table
+    of keys is stored.
+
+    === Public Attributes ===
+    value:
+        the hash of the board's current tile codes
+
+    === Sample Usage ===
+    >>> z = ZobristHash(2, [(0, 0, 'P'), (0, 1, 'B'), (1, 1, 'O')])
+    >>> start = z.value
+    >>> z.update(1, 1, 'O', 'C')
+    >>> z.value == start
+    False
+    >>> z.update(1, 1, 'C', 'O')
+    >>> z.value == start
+    True
+    """
+    # === Private Attributes ===
+    # _width:
+    #   the width of the board
+    value: int
+    _width: int
+
+    def __init__(self, width: int,
+                 tiles: Iterable[Tuple[int, int, str]]) -> None:
+        """Initialize the hash of a board of width <width> whose tiles that
+        are not empty are <tiles>, as (x, y, tile code).
+        """
+        self._width = width
+        self.value = 0
+        for x, y, code in tiles:
+            self.value ^= self._key(x, y, code)
+
+    def update(self, x: int, y: int, old: str, new: str) -> None:
+        """Record that the tile code of tile (<x>, <y>) changed from <old> to
+        <new>.
+        """
+        if old != new:
+            self.value ^= self._key(x, y, old) ^ self._key(x, y, new)
+
+    def _key(self, x: int, y: int, code: str) -> int:
+        """Return the key of tile (<x>, <y>) holding <code>, which is 0 for
+        an empty tile.
+        """
+        if code == '-':
+            return 0
+        z = ((y * self._width + x) * 256 + ord(code)
+             + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+
+
+class TrappedRaccoons:
+    """The raccoons outside garbage cans on a board, and which of them are
+    trapped, kept up to date as tiles change.
+
+    A changed tile can only change whether the raccoons on it and on the four
+    tiles around it are trapped, so only those tiles are checked again, and
+    only when the counts are asked for.
+
+    === Sample Usage ===
+    >>> from a1 import GameBoard, RecyclingBin
+    >>> b = GameBoard(1, 1)
+    >>> b.setup_from_grid('-PB\\n-BR\\n--R')
+    >>> t = TrappedRaccoons(3, 3, b.occupied_tiles())
+    >>> t.count(b.tile_at)
+    (1, 2)
+    >>> _ = RecyclingBin(b, 1, 2)
+    >>> t.update(1, 2, '-', 'B')
+    >>> t.count(b.tile_at)
+    (2, 2)
+    """
+    # === Private Attributes ===
+    # _width, _height:
+    #   the size of the board
+    # _outside:
+    #   the tiles that hold a Raccoon or SmartRaccoon outside a garbage can
+    # _trapped:
+    #   the tiles in _outside whose raccoon was trapped when last checked
+    # _changed:
+    #   the tiles that changed since the counts were last asked for
+    _width: int
+    _height: int
+    _outside: Set[Tuple[int, int]]
+    _trapped: Set[Tuple[int, int]]
+    _changed: Set[Tuple[int, int]]
+
+    def __init__(self, width: int, height: int,
+                 tiles: Iterable[Tuple[int, int, str]]) -> None:
+        """Initialize the raccoons of a <width> by <height> board whose tiles
+        that are not empty are <tiles>, as (x, y, tile code).
+        """
+        self._width = width
+        self._height = height
+        self._outside = {(x, y) for x, y, code in tiles if code in 'RS'}
+        self._trapped = set()
+        self._changed = set(self._outside)
+
+    def update(self, x: int, y: int, old: str, new: str) -> None:
+        """Record that the tile code of tile (<x>, <y>) changed from <old> to
+        <new>.
+        """
+        if old != new:
+            if old in 'RS':
+                self._outside.discard((x, y))
+            if new in 'RS':
+                self._outside.add((x, y))
+            self._changed.add((x, y))
+
+    def count(self, tile_at: Callable[[int, int], str]) -> Tuple[int, int]:
+        """Return the number of trapped raccoons and the number of raccoons
+        outside garbage cans, where <tile_at> returns the current tile code
+        of a tile on the board (see GameBoard.tile_at).
+        """
+        if self._changed:
+            tiles = set(self._changed)
+            for tile in self._changed:
+                tiles.update(_neighbours(tile))
+            self._changed.clear()
+            for tile in tiles & self._outside:
+                if self._is_trapped(tile, tile_at):
+                    self._trapped.add(tile)
+                else:
+                    self._trapped.discard(tile)
+            self._trapped &= self._outside
+        return len(self._trapped), len(self._outside)
+
+    def _is_trapped(self, tile: Tuple[int, int],
+                    tile_at: Callable[[int, int], str]) -> bool:
+        """Return whether the raccoon on <tile> is trapped, as in
+        Raccoon.check_trapped.
+        """
+        for x, y in _neighbours(tile):
+            if 0 <= x < self._width and 0 <= y < self._height \
+                    and tile_at(x, y) in 'OC-':
+                return False
+        return True
+
+
+def _neighbours(tile: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Return the coordinates of the four tiles adjacent to <tile>, as in
+    a1.get_neighbours.
+    """
+    x, y = tile
+    return [(x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,317 @@
+"""A1: Binary level files for Raccoon Raiders, opened with mmap
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module saves boards to binary level files, and opens level files as
+MappedGameBoards without reading them into memory.
+
+A MappedGameBoard maps its level file into memory (copy-on-write, so playing
+a level never changes the file) and reads its tile codes straight from the
+mapping. The characters on a tile are only created, from its tile code, when
+the tile is first looked at with at() or a character moves onto it. Only the
+Player and the raccoons, which take turns from the start, are created when
+the level is opened, and their positions are listed at the end of the file
+so that finding them does not mean scanning every tile.
+
+The level file format is, in order (integers are little-endian):
+    MAGIC (5 bytes), VERSION (1 byte)
+    the width and the height of the board (4 bytes each)
+    the number of turn-taking characters (4 bytes)
+    the tile codes of the board (in the format of GameBoard.to_grid), one
+        byte per tile, row by row and without newlines
+    the x and y coordinates (4 bytes each) of the tile of each turn-taking
+        character (a Player, Raccoon or SmartRaccoon), row by row
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from random import Random
+from typing import Iterator, List, Optional, Set, Tuple, Union
+
+from a1 import (GameBoard, Character, Player, Raccoon, SmartRaccoon,
+                GarbageCan, RecyclingBin)
+
+# The first bytes of every level file, and the version of the format
+MAGIC = b'RRLVL'
+VERSION = 1
+
+# The header, and the coordinates of a turn-taking character
+_HEADER = struct.Struct('<5sBIII')
+_POSITION = struct.Struct('<II')
+
+# The tile codes of the tiles that hold a turn-taking character
+_TURN_TAKERS = 'PRS@'
+
+
+def save_level(board: GameBoard, path: str) -> None:
+    """Write <board> to the level file at <path>.
+
+    >>> import os, tempfile
+    >>> b = GameBoard(1, 1)
+    >>> b.setup_from_grid('P-B\\n-RC')
+    >>> path = os.path.join(tempfile.mkdtemp(), 'small.level')
+    >>> save_level(b, path)
+    >>> os.path.getsize(path) == _HEADER.size + 6 + 2 * _POSITION.size
+    True
+    """
+    positions = [(x, y) for x, y, code in board.occupied_tiles()
+                 if code in _TURN_TAKERS]
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, board.width, board.height,
+                             len(positions)))
+        for row in board.iter_rows():
+            f.write(row.encode('ascii'))
+        for x, y in positions:
+            f.write(_POSITION.pack(x, y))
+
+
+class MappedGameBoard(GameBoard):
+    """A game board whose tile codes are read from a memory-mapped level
+    file, and whose characters are created as they are needed.
+
+    A MappedGameBoard that is not opened from a level file (e.g. one set up
+    with setup_from_grid) keeps its tile codes in a bytearray instead, and
+    creates all its characters at once like a GameBoard.
+
+    === Sample Usage ===
+    >>> import os, tempfile
+    >>> b = GameBoard(1, 1)
+    >>> b.setup_from_grid('P-B-\\n-BRB\\n--BB\\n-C--')
+    >>> path = os.path.join(tempfile.mkdtemp(), 'simple.level')
+    >>> save_level(b, path)
+    >>> level = MappedGameBoard.open(path)
+    >>> level.decoded_count()  # the Player and the Raccoon
+    2
+    >>> level.at(2, 0)[0].get_char()
+    'B'
+    >>> level.decoded_count()
+    3
+    >>> print(level)
+    P-B-
+    -BRB
+    --BB
+    -C--
+    >>> level.check_game_end()
+    13
+    >>> level.close()
+    """
+    # === Private Attributes ===
+    # _grid:
+    #   the tile codes of the board, one byte per tile and row by row,
+    #   starting at index _start
+    # _start:
+    #   the index in _grid of the tile code of tile (0, 0)
+    # _decoded:
+    #   the tiles whose characters have been created, or None if all of them
+    #   have been
+    _grid: Union[bytearray, mmap.mmap]
+    _start: int
+    _decoded: Optional[Set[Tuple[int, int]]]
+
+    def __init__(self, w: int, h: int, rng: Optional[Random] = None) -> None:
+        """Initialize this board to be an empty <w> by <h> board that draws
+        randomness from <rng> (see GameBoard.__init__).
+        """
+        GameBoard.__init__(self, w, h, rng)
+        self._start = 0
+        self._decoded = None
+
+    @classmethod
+    def open(cls, path: str,
+             rng: Optional[Random] = None) -> MappedGameBoard:
+        """Return a board for the level file at <path> that draws randomness
+        from <rng> (see GameBoard.__init__).
+
+        The board keeps the file mapped until it is closed (see close), and
+        it can be used in a with statement that closes it.
+
+        Raise ValueError if the file is not a level file of this version, or
+        it is shorter than its header says.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'short.level')
+        >>> with open(path, 'wb') as f:
+        ...     _ = f.write(MAGIC)
+        >>> MappedGameBoard.open(path)
+        Traceback (most recent call last):
+        ...
+        ValueError: not a version 1 Raccoon Raiders level
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(
+                    f'not a version {VERSION} Raccoon Raiders level')
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, width, height, count = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            data.close()
+            raise ValueError(f'not a version {VERSION} Raccoon Raiders level')
+        if len(data) < _HEADER.size + width * height + count * _POSITION.size:
+            data.close()
+            raise ValueError('the level file is shorter than its header says')
+        board = cls(0, 0, rng)
+        board.width, board.height = width, height
+        board._grid = data
+        board._start = _HEADER.size
+        board._decoded = set()
+        offset = _HEADER.size + width * height
+        for i in range(count):
+            board._decode(*_POSITION.unpack_from(data,
+                                                 offset + i * _POSITION.size))
+        return board
+
+    def close(self) -> None:
+        """Close the level file that this board was opened from, if any.
+
+        A board that was opened from a level file must not be used after it
+        is closed.
+        """
+        if isinstance(self._grid, mmap.mmap):
+            self._grid.close()
+
+    def __enter__(self) -> MappedGameBoard:
+        """Return this board, which is closed at the end of the with
+        statement.
+        """
+        return self
+
+    def __exit__(self, exc_type: Optional[type],
+                 exc_value: Optional[BaseException],
+                 traceback: object) -> None:
+        """Close this board at the end of a with statement."""
+        self.close()
+
+    def decoded_count(self) -> int:
+        """Return the number of tiles whose characters have been created, or
+        the number of tiles of this board if all of them have been.
+        """
+        if self._decoded is None:
+            return self.width * self.height
+        return len(self._decoded)
+
+    def _decode(self, x: int, y: int) -> None:
+        """Create the characters on tile (<x>, <y>) from its tile code, if
+        they have not been created yet.
+        """
+        if self._decoded is None or (x, y) in self._decoded \
+                or not self.on_board(x, y):
+            return
+        self._decoded.add((x, y))
+        code = self.tile_at(x, y)
+        if code == 'R':
+            Raccoon(self, x, y)
+        elif code == 'S':
+            SmartRaccoon(self, x, y)
+        elif code == 'P':
+            Player(self, x, y)
+        elif code in 'O@':
+            GarbageCan(self, x, y, False)
+            if code == '@':
+                Raccoon(self, x, y)
+        elif code == 'C':
+            GarbageCan(self, x, y, True)
+        elif code == 'B':
+            RecyclingBin(self, x, y)
+
+    def place_character(self, c: Character) -> None:
+        """Record that character <c> is on this board, after creating the
+        characters already on its tile.
+        """
+        self._decode(c.x, c.y)
+        GameBoard.place_character(self, c)
+
+    def update_position(self, c: Character, old_x: int, old_y: int) -> None:
+        """Record that character <c> has moved from tile (<old_x>, <old_y>)
+        to tile (c.x, c.y), after creating the characters already on tile
+        (c.x, c.y).
+        """
+        self._decode(c.x, c.y)
+        GameBoard.update_position(self, c, old_x, old_y)
+
+    def at(self, x: int, y: int) -> List[Character]:
+        """Return the characters at tile (x, y), creating them first if they
+        have not been created yet.
+        """
+        self._decode(x, y)
+        return GameBoard.at(self, x, y)
+
+    def char_type(self, x: int, y: int) -> str:
+        """Return the symbol of the first character at (x, y), as in
+        GameBoard.char_type.
+        """
+        return self.at(x, y)[0].get_char()
+
+    def _new_grid(self) -> bytearray:
+        """Return the tile codes of an empty board."""
+        return bytearray(b'-' * (self.width * self.height))
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>)."""
+        self._grid[self._start + y * self.width + x] = ord(code)
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board.
+        """
+        self._grid = bytearray(tiles)
+        self._start = 0
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return self._grid[self._start:self._start + self.width * self.height]
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        Precondition:
+        self.on_board(x, y)
+        """
+        return chr(self._grid[self._start + y * self.width + x])
+
+    def _rows(self) -> Iterator[bytes]:
+        """Yield the tile codes of each row of this board, as ASCII bytes."""
+        width = self.width
+        for i in range(self._start, self._start + width * self.height, width):
+            yield self._grid[i:i + width]
+
+    def to_grid(self) -> List[List[chr]]:
+        """Return the game state as a list of lists of chrs (letters), in the
+        format described in GameBoard.to_grid.
+
+        >>> b = MappedGameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RC')
+        >>> b.to_grid()
+        [['P', '-', '-'], ['-', 'R', 'C']]
+        """
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [list(row.decode('ascii')) for row in self._rows()]
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board, as in
+        GameBoard.iter_rows.
+        """
+        for row in self._rows():
+            yield row.decode('ascii')
+
+    def __str__(self) -> str:
+        """Return a string representation of this board, in the format
+        expected by setup_from_grid.
+        """
+        return b'\n'.join(self._rows()).decode('ascii')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
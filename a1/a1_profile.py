@@ -0,0 +1,130 @@
+"""A1: Profiling the ticks of a Raccoon Raiders game
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains TickProfiler, which collects the timings and call counts
+of a GameBoard while profiling is enabled on it (see
+GameBoard.enable_profiling).
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+# The phases of a tick (a call to GameBoard.give_turns) that can be profiled
+TICK_PHASES = ['player', 'raccoons', 'game_end']
+
+
+class TickProfiler:
+    """Timings and call counts collected by GameBoard.give_turns while
+    profiling is enabled on a board (see GameBoard.enable_profiling).
+
+    Each tick (call to give_turns) is split into three phases: 'player' (the
+    Player's turn), 'raccoons' (the raccoons' turns, which only happen every
+    RACCOON_TURN_FREQUENCY ticks) and 'game_end' (check_game_end). Calls to
+    GameBoard.at and GameBoard.to_grid are counted as well.
+
+    === Public Attributes ===
+    ticks:
+        the number of ticks profiled so far
+    phase_time:
+        the total wall time, in seconds, spent in each phase
+    phase_calls:
+        the number of times each phase has run
+    calls:
+        the total number of calls to 'at' and 'to_grid' made while profiling,
+        inside of ticks or not
+    callback:
+        a function that is given the record of each tick as soon as the tick
+        is over, or None
+
+    === Sample Usage ===
+    >>> from a1 import GameBoard
+    >>> b = GameBoard(3, 1)
+    >>> b.setup_from_grid('P-R')
+    >>> ticks = []
+    >>> profiler = b.enable_profiling(ticks.append)
+    >>> b.give_turns()
+    >>> sorted(ticks[0]['time'])
+    ['game_end', 'player']
+    >>> snapshot = profiler.snapshot()
+    >>> snapshot['ticks'], snapshot['phases']['player']['calls']
+    (1, 1)
+    """
+    # === Private Attributes ===
+    # _mark:
+    #   the perf_counter() value at the end of the last phase
+    # _tick_time:
+    #   the wall time of each phase of the current tick
+    # _tick_calls:
+    #   the calls to 'at' and 'to_grid' made during the current tick
+    ticks: int
+    phase_time: Dict[str, float]
+    phase_calls: Dict[str, int]
+    calls: Dict[str, int]
+    callback: Optional[Callable[[Dict[str, object]], None]]
+    _mark: float
+    _tick_time: Dict[str, float]
+    _tick_calls: Dict[str, int]
+
+    def __init__(self, callback: Optional[Callable[[Dict[str, object]],
+                                                   None]] = None) -> None:
+        """Initialize a profiler that has not seen any ticks, and that passes
+        the record of each tick to <callback> if it is not None.
+        """
+        self.ticks = 0
+        self.phase_time = {phase: 0.0 for phase in TICK_PHASES}
+        self.phase_calls = {phase: 0 for phase in TICK_PHASES}
+        self.calls = {'at': 0, 'to_grid': 0}
+        self.callback = callback
+        self._mark = 0.0
+        self._tick_time = {}
+        self._tick_calls = {'at': 0, 'to_grid': 0}
+
+    def begin_tick(self) -> None:
+        """Record that a tick is starting."""
+        self._tick_time = {}
+        self._tick_calls = {'at': 0, 'to_grid': 0}
+        self._mark = perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Record that <phase> of the current tick just finished."""
+        now = perf_counter()
+        self._tick_time[phase] = now - self._mark
+        self.phase_time[phase] += now - self._mark
+        self.phase_calls[phase] += 1
+        self._mark = now
+
+    def count(self, method: str) -> None:
+        """Record a call to the GameBoard method named <method>."""
+        self.calls[method] += 1
+        self._tick_calls[method] += 1
+
+    def end_tick(self, turn: int) -> None:
+        """Record that the tick that made the board's turns equal to <turn> is
+        over, and pass its record to the callback.
+        """
+        self.ticks += 1
+        if self.callback is not None:
+            self.callback({'turn': turn, 'time': dict(self._tick_time),
+                           'calls': dict(self._tick_calls)})
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return a copy of the totals collected so far."""
+        return {'ticks': self.ticks,
+                'phases': {phase: {'time': self.phase_time[phase],
+                                   'calls': self.phase_calls[phase]}
+                           for phase in TICK_PHASES},
+                'calls': dict(self.calls)}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,217 @@
+"""A1: Deterministic replay logs of Raccoon Raiders games
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module records games so that they can be replayed exactly, e.g. to
+reproduce a bug or to profile a real game at full CPU speed.
+
+The raccoons draw their moves from the board's random generator, so a game is
+determined by the board it starts from (including the order in which its
+raccoons take their turns), the seed its generator is given when the
+recording starts, and the Player's move (or lack of one) in every tick.
+A ReplayLog stores exactly that, and takes about one byte per tick on disk.
+
+The log file format is, in order (integers are little-endian):
+    MAGIC (5 bytes), VERSION (1 byte)
+    the board's turns when the recording started (4 bytes)
+    the length of the seed (2 bytes), and the seed in UTF-8
+    the length of the compressed board (4 bytes), and the zlib-compressed
+        string of the board (in the format of GameBoard.__str__)
+    the number of raccoons (4 bytes), and the x and y coordinates (4 bytes
+        each) of the tile of each raccoon, in the board's turn_order
+    one byte per tick, in the format of GameBoard.start_recording
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from random import Random
+from typing import List, Optional, Tuple, Type, Union
+
+import a1
+
+# The first bytes of every log file, and the version of the format
+MAGIC = b'RRLOG'
+VERSION = 2
+
+# The fixed-size parts of the header
+_HEADER = struct.Struct('<5sBI')
+_SEED_LENGTH = struct.Struct('<H')
+_GRID_LENGTH = struct.Struct('<I')
+_COUNT = struct.Struct('<I')
+_POSITION = struct.Struct('<II')
+
+# Translation table that takes the raccoons out of a board's string
+_NO_RACCOONS = str.maketrans('RS@', '--O')
+
+
+class ReplayLog:
+    """A recording of a game.
+
+    === Public Attributes ===
+    seed:
+        the seed the board's random generator was given when the recording
+        started
+    grid:
+        the board when the recording started, in the format expected by
+        GameBoard.setup_from_grid
+    turns:
+        the board's turns when the recording started
+    raccoons:
+        the tiles of the board's raccoons when the recording started, in the
+        order they take their turns (see GameBoard.turn_order)
+    events:
+        one byte per tick, in the format of GameBoard.start_recording
+
+    === Sample Usage ===
+    >>> b = a1.GameBoard(1, 1)
+    >>> b.setup_from_grid('P-B-\\n--R-\\nO---')
+    >>> log = ReplayLog.start(b, 'bug 42')
+    >>> for _ in range(a1.RACCOON_TURN_FREQUENCY):
+    ...     b.handle_event(a1.RIGHT)
+    ...     b.give_turns()
+    >>> copy = ReplayLog.from_bytes(log.to_bytes())
+    >>> str(copy.replay()) == str(b)
+    True
+    """
+    seed: str
+    grid: str
+    turns: int
+    raccoons: List[Tuple[int, int]]
+    events: bytearray
+
+    def __init__(self, seed: str, grid: str, turns: int = 0,
+                 events: Optional[bytearray] = None,
+                 raccoons: Optional[List[Tuple[int, int]]] = None) -> None:
+        """Initialize a log of a game that started from the board <grid>
+        after <turns> turns, with the board's random generator seeded with
+        <seed>, and whose ticks so far are <events>.
+
+        The raccoons take their turns in the order of their tiles in
+        <raccoons>, or row by row if <raccoons> is None.
+        """
+        self.seed = seed
+        self.grid = grid
+        self.turns = turns
+        self.events = bytearray() if events is None else events
+        if raccoons is None:
+            raccoons = [(x, y) for y, row in enumerate(grid.split('\n'))
+                        for x, code in enumerate(row) if code in 'RS@']
+        self.raccoons = raccoons
+
+    @classmethod
+    def start(cls, board: a1.GameBoard, seed: Union[int, str]) -> ReplayLog:
+        """Seed the random generator of <board> with <seed> (as a string),
+        start recording the game on it, and return the log that it is
+        recorded into.
+
+        The characters of <board> are left as they are, and an event that
+        its Player has not acted on yet is recorded in the first tick.
+
+        Nothing else may use board.rng while the game is played, or the game
+        cannot be replayed.
+        """
+        log = cls(str(seed), '\n'.join(board.iter_rows()), board.turns,
+                  raccoons=[(r.x, r.y) for r in board.turn_order()])
+        board.rng.seed(log.seed)
+        board.start_recording(log.events)
+        return log
+
+    def replay(self, board_class: Type[a1.GameBoard] = a1.GameBoard,
+               ticks: Optional[int] = None) -> a1.GameBoard:
+        """Return a new board of class <board_class> on which the first
+        <ticks> ticks of this log (all of them by default) have been played,
+        as fast as possible.
+        """
+        board = board_class(1, 1, Random(self.seed))
+        board.setup_from_grid(self.grid.translate(_NO_RACCOONS))
+        rows = self.grid.split('\n')
+        for x, y in self.raccoons:
+            if rows[y][x] == 'S':
+                a1.SmartRaccoon(board, x, y)
+            else:
+                a1.Raccoon(board, x, y)  # inside the open can if on '@'
+        board.turns = self.turns
+        events = self.events if ticks is None else self.events[:ticks]
+        for code in events:
+            if code:
+                board.handle_event(a1.DIRECTIONS[code - 1])
+            board.give_turns()
+        return board
+
+    def to_bytes(self) -> bytes:
+        """Return this log in the log file format.
+
+        >>> log = ReplayLog('1', 'P-', 0, bytearray([3, 0, 0]))
+        >>> data = log.to_bytes()
+        >>> data[:5], data[-3:]
+        (b'RRLOG', b'\\x03\\x00\\x00')
+        """
+        seed = self.seed.encode('utf-8')
+        grid = zlib.compress(self.grid.encode('ascii'))
+        return b''.join([_HEADER.pack(MAGIC, VERSION, self.turns),
+                         _SEED_LENGTH.pack(len(seed)), seed,
+                         _GRID_LENGTH.pack(len(grid)), grid,
+                         _COUNT.pack(len(self.raccoons))]
+                        + [_POSITION.pack(x, y) for x, y in self.raccoons]
+                        + [self.events])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> ReplayLog:
+        """Return the log that <data>, in the log file format, describes.
+
+        Raise ValueError if <data> is not a log of this version.
+        """
+        magic, version, turns = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'not a version {VERSION} Raccoon Raiders log')
+        offset = _HEADER.size
+        (length,) = _SEED_LENGTH.unpack_from(data, offset)
+        offset += _SEED_LENGTH.size
+        seed = data[offset:offset + length].decode('utf-8')
+        offset += length
+        (length,) = _GRID_LENGTH.unpack_from(data, offset)
+        offset += _GRID_LENGTH.size
+        grid = zlib.decompress(data[offset:offset + length]).decode('ascii')
+        offset += length
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        raccoons = [_POSITION.unpack_from(data, offset + i * _POSITION.size)
+                    for i in range(count)]
+        offset += count * _POSITION.size
+        return cls(seed, grid, turns, bytearray(data[offset:]), raccoons)
+
+    def save(self, path: str) -> None:
+        """Write this log to the file at <path>."""
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> ReplayLog:
+        """Return the log saved in the file at <path>."""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import sys
+    from time import perf_counter
+
+    if len(sys.argv) > 1:  # python a1_replay.py game.log replays a log
+        replay_log = ReplayLog.load(sys.argv[1])
+        start = perf_counter()
+        replayed = replay_log.replay()
+        elapsed = perf_counter() - start
+        replayed.write_to(sys.stdout)
+        print(f'{len(replay_log.events)} ticks in {elapsed:.3f}s, '
+              f'score {replayed.check_game_end()}')
@@ -22,15 +22,37 @@ any changes, are expressly prohibited.
 All of the files in this directory and all subdirectories are:
 Copyright (c) University of Toronto
 """
+import sys
 from datetime import date
 from io import StringIO
+from random import Random, random
+
+import pytest
+
 from a1 import *
+from a1_bench import benchmarks
+from a1_bits import BitGameBoard
+from a1_compact import CompactGameBoard
+from a1_level import MappedGameBoard, save_level
+from a1_replay import ReplayLog
+from a1_sim import (GameSettings, populate_board, run_game, scripted,
+                    tournament)
+from a1_solver import Solver
+from a1_sparse import CHUNK_SIZE, SparseGameBoard
 
 # A string representing a simple 4 by 4 game board.
 # We use this in one of the tests below. You can use it in your own testing, but
 # you do not have to.
 SIMPLE_BOARD_STRING = 'P-B-\n-BRB\n--BB\n-C--'
 
+# The other kinds of board, as (module, class name), which must all play
+# exactly like a GameBoard. They are imported by the tests, since some of the
+# modules need numpy.
+BOARD_CLASSES = [('a1_array', 'ArrayGameBoard'), ('a1_bits', 'BitGameBoard'),
+                 ('a1_compact', 'CompactGameBoard'),
+                 ('a1_level', 'MappedGameBoard'),
+                 ('a1_sparse', 'SparseGameBoard')]
+
 
 def simple_board_setup() -> GameBoard:
     """Set up a simple game board"""
@@ -179,6 +201,451 @@ def test_simple_give_turns() -> None:
     assert (p.x, p.y) == (1, 0)  # Player moved right!
 
 
+def test_at_follows_moves() -> None:
+    """Test that GameBoard.at stays correct as characters move, including a
+    Raccoon climbing into an open GarbageCan."""
+    b = GameBoard(3, 1)
+    r = Raccoon(b, 0, 0)
+    g = GarbageCan(b, 2, 0, False)
+    assert r.move(RIGHT)
+    assert b.at(0, 0) == []
+    assert b.at(1, 0) == [r]
+    assert r.move(RIGHT)
+    assert r.inside_can
+    assert b.at(1, 0) == []
+    assert b.at(2, 0) == [g, r]
+    assert b.at(3, 0) == []
+
+
+def test_to_grid_tracks_changes() -> None:
+    """Test that to_grid reflects moves and lock changes, and that the grid
+    it returns is a copy the caller is free to modify."""
+    b = GameBoard(3, 1)
+    p = Player(b, 0, 0)
+    g = GarbageCan(b, 2, 0, False)
+    grid = b.to_grid()
+    assert grid == [['P', '-', 'O']]
+    grid[0][1] = 'B'
+    assert b.to_grid() == [['P', '-', 'O']]
+    assert p.move(RIGHT)
+    assert p.move(RIGHT)  # locks the garbage can
+    assert g.locked
+    assert b.to_grid() == [['-', 'P', 'C']]
+
+
+def test_adjacent_bin_score_large_cluster() -> None:
+    """Test adjacent_bin_score on a cluster far deeper than the recursion
+    limit, next to a smaller separate cluster."""
+    b = GameBoard(1, 1)
+    rows = ['B' * 150] * 150 + ['-' * 150, 'BBB' + '-' * 147]
+    b.setup_from_grid('\n'.join(rows))
+    assert b.adjacent_bin_score() == 150 * 150
+    b.setup_from_grid('---\n---')
+    assert b.adjacent_bin_score() == 1
+
+
+def test_adjacent_bin_score_follows_pushes() -> None:
+    """Test that adjacent_bin_score stays correct as the Player pushes bins
+    apart and back together."""
+    b = GameBoard(1, 1)
+    b.setup_from_grid('-P--\nBBBB\n----')
+    assert b.adjacent_bin_score() == 4
+    b.handle_event(DOWN)
+    b.give_turns()  # splits the row of bins into 1 + 1 + 2
+    assert str(b) == '----\nBPBB\n-B--'
+    assert b.adjacent_bin_score() == 2
+    RecyclingBin(b, 0, 2)  # joins two of the pieces
+    assert b.adjacent_bin_score() == 3
+
+
+def test_recyclingbin_long_chain_push() -> None:
+    """Test pushing a row of bins that is longer than the recursion limit."""
+    length = sys.getrecursionlimit() + 10
+    b = GameBoard(1, 1)
+    b.setup_from_grid('P' + 'B' * length + '-')
+    first = b.at(1, 0)[0]
+    b.handle_event(RIGHT)
+    b.give_turns()
+    assert str(b) == '-P' + 'B' * length
+    assert b.at(2, 0) == [first]
+    assert b.adjacent_bin_score() == length
+    b.handle_event(RIGHT)
+    b.give_turns()
+    assert str(b) == '-P' + 'B' * length  # the row is against the edge
+
+
+def test_characters_are_slotted() -> None:
+    """Test that characters keep their public attributes without carrying a
+    per-instance __dict__."""
+    b = simple_board_setup()
+    for y in range(b.height):
+        for x in range(b.width):
+            for c in b.at(x, y):
+                assert not hasattr(c, '__dict__')
+                assert (c.board, c.x, c.y) == (b, x, y)
+    with pytest.raises(AttributeError):
+        b.at(0, 0)[0].colour = 'blue'
+
+
+def test_raccoon_placed_in_can() -> None:
+    """Test that a Raccoon placed on an open GarbageCan is inside of it."""
+    b = GameBoard(2, 1)
+    b.setup_from_grid('@-')
+    r = b.at(0, 0)[1]
+    assert isinstance(r, Raccoon)
+    assert r.inside_can
+    assert b.check_game_end() == 1
+
+
+@pytest.mark.parametrize('module, name', BOARD_CLASSES)
+def test_board_matches_game_board(module: str, name: str) -> None:
+    """Test that each other kind of board plays exactly like a GameBoard on a
+    board wider than a chunk of a SparseGameBoard, that the characters it
+    returns compare equal, and that it finds the same largest cluster on a
+    board of many clusters."""
+    board_class = getattr(pytest.importorskip(module), name)
+    grid = '\n'.join(row + '-' * 40 for row in ['P-BO-S', 'B-BB-C', '-R-B@-',
+                                                'OBB-R-', '-----R'])
+    moves = [RIGHT, DOWN, DOWN, LEFT, UP, RIGHT, RIGHT, DOWN]
+    boards = [GameBoard(1, 1, Random(148)), board_class(1, 1, Random(148))]
+    for b in boards:
+        b.setup_from_grid(grid)
+    for turn in range(3 * RACCOON_TURN_FREQUENCY):
+        states = []
+        for b in boards:
+            b.handle_event(moves[turn % len(moves)])
+            b.give_turns()
+            states.append((str(b), b.to_grid(), list(b.occupied_tiles()),
+                           b.check_game_end(), b.adjacent_bin_score()))
+        assert states[0] == states[1]
+    other = boards[1]
+    for y in range(other.height):
+        for x in range(other.width):
+            assert other.at(x, y) == other.at(x, y)
+            assert [c.get_char() for c in other.at(x, y)] == \
+                [c.get_char() for c in boards[0].at(x, y)]
+    rng = Random(2022)
+    grid = '\n'.join(''.join(rng.choice('BB-') for _ in range(300))
+                     for _ in range(120))
+    for b in boards:
+        b.setup_from_grid(grid)
+    assert boards[0].adjacent_bin_score() == other.adjacent_bin_score()
+
+
+def test_sparse_board_huge_map() -> None:
+    """Test that a 100,000 by 100,000 SparseGameBoard only stores the chunks
+    its characters are in."""
+    b = SparseGameBoard(100_000, 100_000, Random(2022))
+    populate_board(b, 50, 50, 400)
+    for _ in range(RACCOON_TURN_FREQUENCY):
+        b.give_turns()
+    tiles = list(b.occupied_tiles())
+    assert len(tiles) == 501
+    assert b.chunk_count() == len({(x // CHUNK_SIZE, y // CHUNK_SIZE)
+                                   for x, y, _ in tiles})
+    x, y, code = tiles[-1]
+    assert b.view(x, y, 1, 2) == code + '\n' + b.view(x, y + 1, 1, 1)
+    assert b.check_game_end() is None
+
+
+def test_batch_game_matches_game_board() -> None:
+    """Test that every board of a BatchGame plays exactly like a GameBoard
+    whose raccoons draw from a generator in the same state."""
+    pytest.importorskip('numpy')
+    from a1_batch import BatchGame
+    grids = ['P-B-\nS-O-\n--BR\nC--O', '-SO-\nPBB-\nR-@-\nOBC-',
+             'R---\n-BP-\n-OS-\n----']
+    moves = [RIGHT, DOWN, None, LEFT, UP, DOWN, RIGHT, RIGHT]
+    batch = BatchGame(grids, [Random(k) for k in range(len(grids))])
+    for turn in range(RACCOON_TURN_FREQUENCY * 3):
+        batch.handle_events([moves[(turn + k) % len(moves)]
+                             for k in range(len(grids))])
+        batch.give_turns()
+    scores = batch.check_game_end()
+    for k, grid in enumerate(grids):
+        b = GameBoard(4, 4, Random(k))
+        b.setup_from_grid(grid)
+        for turn in range(RACCOON_TURN_FREQUENCY * 3):
+            move = moves[(turn + k) % len(moves)]
+            if move is not None:
+                b.handle_event(move)
+            b.give_turns()
+        assert batch.board_str(k) == str(b)
+        score = b.check_game_end()
+        assert scores[k] == (-1 if score is None else score)
+
+
+def test_sight_distance_follows_changes() -> None:
+    """Test that the line of sight indexes match a scan of the board as
+    characters move and garbage cans are unlocked."""
+    b = GameBoard(1, 1)
+    b.setup_from_grid('S-O-C-S\n-B--R--\nOS@-O-P\n---S--O')
+    b.sight_distance(0, 0, DOWN)  # build the indexes before anything changes
+    for _ in range(4 * RACCOON_TURN_FREQUENCY):
+        b.handle_event(LEFT)
+        b.give_turns()
+        grid = b.to_grid()
+        for y in range(b.height):
+            for x in range(b.width):
+                for dx, dy in DIRECTIONS:
+                    expected = 0
+                    i, j = x + dx, y + dy
+                    while b.on_board(i, j) and grid[j][i] in 'P-S':
+                        i, j = i + dx, j + dy
+                    if b.on_board(i, j) and grid[j][i] == 'O':
+                        expected = abs(i - x) + abs(j - y)
+                    assert b.sight_distance(x, y, (dx, dy)) == expected
+
+
+def test_snapshot_restore() -> None:
+    """Test rolling a board back to nested snapshots after moves, pushes,
+    locks and raccoon turns."""
+    b = simple_board_setup()
+    start = b.snapshot()
+    before = (str(b), b.at(2, 1), b.adjacent_bin_score())
+    for direction in [RIGHT, DOWN, RIGHT]:
+        b.handle_event(direction)
+        b.give_turns()
+    middle = b.snapshot()
+    middle_str = str(b)
+    for _ in range(2 * RACCOON_TURN_FREQUENCY):
+        b.handle_event(DOWN)
+        b.give_turns()
+    b.restore(middle)
+    assert (str(b), b.turns) == (middle_str, 3)
+    b.restore(start)
+    assert (str(b), b.at(2, 1), b.adjacent_bin_score()) == before
+    assert (b.turns, b.ended) == (0, False)
+
+
+def test_replay_log_reproduces_game(tmp_path) -> None:
+    """Test that a recorded game on a random board replays exactly from its
+    log file, with one byte per tick."""
+    b = GameBoard(8, 8)
+    populate_board(b, 6, 4, 16)
+    raccoons = b.turn_order()
+    b.handle_event(RIGHT)  # handled before the recording starts
+    log = ReplayLog.start(b, 2022)
+    assert b.turn_order() == raccoons
+    b.give_turns()
+    rng = Random(148)
+    for _ in range(5 * RACCOON_TURN_FREQUENCY - 1):
+        if rng.random() < 0.5:
+            b.handle_event(rng.choice(DIRECTIONS))
+        b.give_turns()
+    log.save(tmp_path / 'game.log')
+    loaded = ReplayLog.load(tmp_path / 'game.log')
+    assert len(loaded.events) == b.turns
+    assert loaded.events[0] == DIRECTIONS.index(RIGHT) + 1
+    assert str(loaded.replay()) == str(b)
+    assert all(b.at(r.x, r.y)[-1] is r for r in raccoons)
+    assert loaded.replay(ticks=0).to_grid() == [list(row) for row in
+                                                log.grid.split('\n')]
+
+
+def test_level_file_opens_lazily(tmp_path) -> None:
+    """Test that a board opened from a level file only creates its
+    turn-taking characters up front, and plays exactly like a GameBoard set
+    up from the same grid."""
+    populated = GameBoard(12, 12)
+    populate_board(populated, 6, 10, 40)
+    save_level(populated, tmp_path / 'city.level')
+    b = GameBoard(1, 1, Random(148))
+    b.setup_from_grid(str(populated))
+    level = MappedGameBoard.open(tmp_path / 'city.level', Random(148))
+    assert str(level) == str(b)
+    assert level.decoded_count() == 7
+    for _ in range(5 * RACCOON_TURN_FREQUENCY):
+        for board in (b, level):
+            board.handle_event(LEFT)
+            board.give_turns()
+        assert str(level) == str(b)
+        assert level.check_game_end() == b.check_game_end()
+    assert level.decoded_count() < 12 * 12
+    assert [[c.get_char() for c in level.at(x, y)] for x in range(12)
+            for y in range(12)] == [[c.get_char() for c in b.at(x, y)]
+                                    for x in range(12) for y in range(12)]
+    assert (tmp_path / 'city.level').read_bytes().count(b'P') == 1
+    level.close()
+
+
+def test_level_file_truncated(tmp_path) -> None:
+    """Test that a level file that is cut short is rejected with ValueError,
+    and that a board opened in a with statement is closed at its end."""
+    b = GameBoard(1, 1)
+    b.setup_from_grid('P-B-\n-BRB\n--BB\n-C-@')
+    save_level(b, tmp_path / 'small.level')
+    data = (tmp_path / 'small.level').read_bytes()
+    for size in [0, 3, 17, 30, len(data) - 1]:
+        (tmp_path / 'cut.level').write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            MappedGameBoard.open(tmp_path / 'cut.level')
+    with MappedGameBoard.open(tmp_path / 'small.level') as level:
+        assert str(level) == str(b)
+    with pytest.raises(ValueError):
+        level.tile_at(0, 0)  # the mapping is closed
+
+
+def test_setup_from_grid_file(tmp_path) -> None:
+    """Test that a board can be set up from a file of rows, exactly as from
+    the same grid as a string, and that bad grids are rejected."""
+    grid = 'P-B-\n-BRB\n--BB\n-C-@\nS-O-'
+    (tmp_path / 'level.txt').write_text(grid + '\n')
+    b = GameBoard(1, 1)
+    b.setup_from_grid(grid)
+    with open(tmp_path / 'level.txt') as f:
+        from_file = GameBoard(1, 1)
+        from_file.setup_from_grid(f)
+    assert (from_file.width, from_file.height) == (4, 5)
+    assert str(from_file) == str(b)
+    for x in range(4):
+        for y in range(5):
+            assert [c.get_char() for c in from_file.at(x, y)] == \
+                [c.get_char() for c in b.at(x, y)]
+    assert from_file.at(3, 3)[1].inside_can
+    assert from_file.check_game_end() == b.check_game_end()
+    with pytest.raises(ValueError):
+        b.setup_from_grid('P-B\n-B-B')
+    with pytest.raises(ValueError):
+        b.setup_from_grid(['P-X', '-B-'])
+
+
+def test_setup_from_grid_short_rows() -> None:
+    """Test that rows shorter than the first row are padded with empty tiles,
+    as in the handout board, and that a trailing newline is ignored."""
+    b = GameBoard(8, 6)
+    b.setup_from_grid('P-O----S\n---BBB-\n------B-\n-BRBB-O-\n'
+                      '---B-B--\n--O---S-')
+    assert (b.width, b.height) == (8, 6)
+    assert str(b).split('\n')[1] == '---BBB--'
+    assert b.at(7, 1) == []
+    b.setup_from_grid(SIMPLE_BOARD_STRING + '\n')
+    assert (b.width, b.height) == (4, 4)
+    assert str(b) == SIMPLE_BOARD_STRING
+
+
+@pytest.mark.parametrize('module, name', [('a1', 'GameBoard')]
+                         + BOARD_CLASSES)
+def test_boards_write_rows(module: str, name: str) -> None:
+    """Test that every kind of board streams the rows of its string, and
+    that the written rows set up the same board again."""
+    board_class = getattr(pytest.importorskip(module), name)
+    grid = 'P-B-\n-BRB\n--BB\n-C-@\nS-O-'
+    b = board_class(1, 1)
+    b.setup_from_grid(grid)
+    assert list(b.iter_rows()) == grid.split('\n')
+    assert str(b) == grid
+    out = StringIO()
+    b.write_to(out)
+    assert out.getvalue() == grid + '\n'
+    out.seek(0)
+    b.setup_from_grid(out)
+    assert str(b) == grid
+
+
+def test_boards_draw_from_own_generators() -> None:
+    """Test that boards with generators in the same state play the same game
+    no matter what other boards and the random module do in between."""
+    boards = [GameBoard(8, 8, Random(2022)) for _ in range(2)]
+    for b in boards:
+        populate_board(b, 6, 4, 16)
+    for _ in range(4 * RACCOON_TURN_FREQUENCY):
+        for b in boards:
+            random()
+            b.give_turns()
+    assert str(boards[0]) == str(boards[1])
+    rng = boards[1].rng
+    boards[1].setup_from_grid(str(boards[1]))
+    assert boards[1].rng is rng
+
+
+def test_game_end_follows_changes() -> None:
+    """Test that the incremental game end check agrees with checking every
+    raccoon, as raccoons move, are trapped and are restored from snapshots."""
+    b = GameBoard(8, 8, Random(148))
+    populate_board(b, 8, 4, 30)
+    b.check_game_end()
+    start = b.snapshot()
+    for _ in range(20 * RACCOON_TURN_FREQUENCY):
+        b.handle_event(b.rng.choice(DIRECTIONS))
+        b.give_turns()
+        raccoons = [c for y in range(8) for x in range(8)
+                    for c in b.at(x, y) if isinstance(c, Raccoon)]
+        ended = all(r.inside_can or r.check_trapped() for r in raccoons)
+        assert (b.check_game_end() is not None) == ended
+    b.restore(start)
+    assert b.check_game_end() is None
+    b.setup_from_grid('PRB\n-B-')
+    assert b.check_game_end() == 11
+
+
+def test_solver_plan_wins() -> None:
+    """Test that following the solver's fastest worst-case plan ends the game
+    in the number of ticks it found, whatever the raccoons do."""
+    for seed in range(5):
+        b = GameBoard(1, 1, Random(seed))
+        b.setup_from_grid('P-B-\n-B--\nB-BR')
+        before = (str(b), b.zobrist_hash())
+        solver = Solver(b, table_size=8)
+        solution = solver.solve(8, fastest=True)
+        assert (str(b), b.zobrist_hash()) == before
+        assert len(solver.table) <= 8
+        for _ in range(solution.ticks):
+            move = Solver(b).solve(solution.ticks - b.turns).move
+            if move is not None:
+                b.handle_event(move)
+            b.give_turns()
+        assert b.check_game_end() >= solution.score
+
+
+def test_profiling_give_turns() -> None:
+    """Test the pull and push APIs of give_turns profiling."""
+    b = simple_board_setup()
+    ticks = []
+    profiler = b.enable_profiling(ticks.append)
+    for _ in range(RACCOON_TURN_FREQUENCY):
+        b.give_turns()
+    b.at(0, 0)
+    b.to_grid()
+    b.disable_profiling()
+    b.give_turns()
+    assert len(ticks) == RACCOON_TURN_FREQUENCY
+    assert ticks[-1]['turn'] == RACCOON_TURN_FREQUENCY
+    assert set(ticks[-1]['time']) == {'player', 'raccoons', 'game_end'}
+    assert set(ticks[0]['time']) == {'player', 'game_end'}
+    snapshot = profiler.snapshot()
+    assert snapshot['ticks'] == RACCOON_TURN_FREQUENCY
+    assert snapshot['phases']['raccoons']['calls'] == 1
+    assert snapshot['phases']['game_end']['time'] > 0
+    assert snapshot['calls']['at'] == sum(t['calls']['at'] for t in ticks) + 1
+
+
+def test_run_game_headless() -> None:
+    """Test playing a scripted game to the end without a display."""
+    b = simple_board_setup()
+    result = run_game(b, scripted([RIGHT, DOWN, DOWN, DOWN, RIGHT]))
+    assert b.ended
+    assert result == (b.check_game_end(), b.turns, 1, 0)
+
+
+def test_tournament_reproducible() -> None:
+    """Test that a tournament's results depend only on its master seed."""
+    settings = GameSettings(width=6, height=6, num_bins=9, max_turns=500)
+    first = sorted(tournament(8, 2022, settings, processes=2, chunksize=1))
+    second = sorted(tournament(8, 2022, settings, processes=3))
+    assert [number for number, _ in first] == list(range(8))
+    assert first == second
+    for _, result in first:
+        assert result.trapped + result.in_cans <= settings.num_raccoons
+
+
+def test_benchmarks_run() -> None:
+    """Test that every benchmark runs and reports its timings."""
+    records = benchmarks(6, 0.5, 1)
+    assert len({record['benchmark'] for record in records}) == len(records)
+    assert all(record['best'] >= 0 for record in records)
+
+
 if __name__ == '__main__':
     import pytest
 
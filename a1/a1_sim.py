@@ -0,0 +1,280 @@
+"""A1: Headless simulation of Raccoon Raiders games
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module plays Raccoon Raiders games without a display. It does not import
+pygame, and it steps a GameBoard as fast as the CPU allows instead of waiting
+LOOP_DELAY milliseconds between turns, so it can be used to run many games in
+tests and batch jobs.
+
+The Player's moves come from a policy: a function that is given the board
+before each turn and returns the direction to move in, or None to stay put.
+
+For tuning the game's settings, tournament plays many seeded random games on
+a pool of worker processes and streams back their results.
+"""
+
+from multiprocessing import Pool
+from random import Random
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import a1
+
+# Dimensions of the game board, in squares.
+BOARD_WIDTH = 10  # 20
+BOARD_HEIGHT = 10  # 15
+
+# Number of each type of Character to include in a random game
+NUM_RACCOONS = 4
+NUM_GARBAGE_CANS = 4
+NUM_RECYCLING_BINS = int(BOARD_HEIGHT * BOARD_WIDTH * 0.25)
+
+# Fraction of garbage cans that are to be locked at the start of the game.
+FRACTION_LOCKED = 0.1
+
+# Fraction of "smart" raccoons
+FRACTION_SMART = 0.5
+
+# A game that has not ended after this many turns is stopped
+MAX_TURNS = 5000
+
+# A function that picks the Player's next move given the board, or None
+Policy = Callable[[a1.GameBoard], Optional[Tuple[int, int]]]
+
+
+class GameResult(NamedTuple):
+    """The outcome of a headless game.
+
+    === Public Attributes ===
+    score:
+        the score of the game, or None if it had not ended when it was stopped
+    turns:
+        the number of turns that were played
+    trapped:
+        the number of raccoons that were trapped at the end of the game
+    in_cans:
+        the number of raccoons that were inside garbage cans at the end of
+        the game
+    """
+    score: Optional[int]
+    turns: int
+    trapped: int
+    in_cans: int
+
+
+class GameSettings(NamedTuple):
+    """How to set up and play the random games of a tournament.
+
+    === Public Attributes ===
+    width, height:
+        the dimensions of each board, in squares
+    num_raccoons, num_cans, num_bins:
+        the number of each type of Character that populate_board places
+    fraction_smart:
+        the probability that each Raccoon is a SmartRaccoon
+    fraction_locked:
+        the probability that each GarbageCan starts locked
+    max_turns:
+        the number of turns after which a game is stopped
+    """
+    width: int = BOARD_WIDTH
+    height: int = BOARD_HEIGHT
+    num_raccoons: int = NUM_RACCOONS
+    num_cans: int = NUM_GARBAGE_CANS
+    num_bins: int = NUM_RECYCLING_BINS
+    fraction_smart: float = FRACTION_SMART
+    fraction_locked: float = FRACTION_LOCKED
+    max_turns: int = MAX_TURNS
+
+
+def scripted(moves: Iterable[Optional[Tuple[int, int]]]) -> Policy:
+    """Return a policy that plays <moves> in order, one per turn, and then
+    stays put.
+
+    >>> b = a1.GameBoard(3, 1)
+    >>> b.setup_from_grid('P--')
+    >>> policy = scripted([a1.RIGHT, None, a1.RIGHT])
+    >>> [policy(b) for _ in range(4)]
+    [(1, 0), None, (1, 0), None]
+    """
+    remaining = iter(moves)
+    return lambda board: next(remaining, None)
+
+
+def random_policy(rng: Random) -> Policy:
+    """Return a policy that moves in a direction picked with <rng> every turn.
+
+    >>> policy = random_policy(Random(148))
+    >>> policy(a1.GameBoard(3, 3)) in a1.DIRECTIONS
+    True
+    """
+    return lambda board: rng.choice(a1.DIRECTIONS)
+
+
+def run_game(board: a1.GameBoard, policy: Optional[Policy] = None,
+             max_turns: int = MAX_TURNS) -> GameResult:
+    """Play the game on <board> until it ends or <max_turns> turns have been
+    played, and return its result.
+
+    Before each turn, the Player's move is taken from <policy> (if there is
+    one) and handled exactly like a key press in a1_game, and then every
+    character is given its turn with GameBoard.give_turns.
+
+    Precondition:
+    board has a Player
+
+    >>> b = a1.GameBoard(1, 1)
+    >>> b.setup_from_grid('P--\\nBRB\\n-B-')
+    >>> run_game(b, scripted([a1.RIGHT]))
+    GameResult(score=11, turns=1, trapped=1, in_cans=0)
+    >>> b.setup_from_grid('P-R')
+    >>> run_game(b, max_turns=10)
+    GameResult(score=None, turns=10, trapped=0, in_cans=0)
+    """
+    while not board.ended and board.turns < max_turns:
+        if policy is not None:
+            direction = policy(board)
+            if direction is not None:
+                board.handle_event(direction)
+        board.give_turns()
+    trapped = in_cans = 0
+    for x, y, code in board.occupied_tiles():
+        if code == '@':
+            in_cans += 1
+        elif code in 'RS' and board.at(x, y)[0].check_trapped():
+            trapped += 1
+    return GameResult(board.check_game_end(), board.turns, trapped, in_cans)
+
+
+def play_seeded(game: Tuple[int, int, GameSettings]) \
+        -> Tuple[int, GameResult]:
+    """Play one random game with the Player moving randomly, and return its
+    number together with its result.
+
+    <game> is (game number, master seed, settings). Both the board and every
+    move in the game are drawn from a random generator seeded from the master
+    seed and the game number, so the result does not depend on which process
+    plays the game or what it played before.
+
+    >>> settings = GameSettings(width=5, height=5, num_bins=6)
+    >>> play_seeded((3, 148, settings)) == play_seeded((3, 148, settings))
+    True
+    """
+    number, master_seed, settings = game
+    # the raccoons and populate_board draw from the board's generator
+    board = a1.GameBoard(settings.width, settings.height,
+                         Random(f'{master_seed}:{number}'))
+    populate_board(board, settings.num_raccoons, settings.num_cans,
+                   settings.num_bins, settings.fraction_smart,
+                   settings.fraction_locked)
+    policy = random_policy(Random(f'{master_seed}:{number}:player'))
+    return number, run_game(board, policy, settings.max_turns)
+
+
+def tournament(num_games: int, master_seed: int,
+               settings: GameSettings = GameSettings(),
+               processes: Optional[int] = None,
+               chunksize: int = 8) -> Iterator[Tuple[int, GameResult]]:
+    """Play <num_games> random games with <settings> on a pool of
+    <processes> worker processes (one per CPU by default), and yield
+    (game number, result) for each game as soon as it finishes.
+
+    Games are numbered 0 to num_games - 1 and are handed to the workers
+    <chunksize> at a time. Results arrive in whatever order the games finish,
+    but the result of each game depends only on <master_seed> and its number
+    (see play_seeded), so a tournament can be reproduced exactly.
+
+    >>> results = sorted(tournament(4, 148, GameSettings(width=4, height=4,
+    ...                                                 num_bins=3),
+    ...                             processes=2))
+    >>> [number for number, _ in results]
+    [0, 1, 2, 3]
+    >>> results == sorted(tournament(4, 148, GameSettings(4, 4, num_bins=3)))
+    True
+    """
+    games = ((number, master_seed, settings) for number in range(num_games))
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(play_seeded, games, chunksize)
+
+
+# this depends on your place_character method in the GameBoard class
+# in order to work, since
+# Character.__init__ relies on GameBoard.place_character!
+def populate_board(board: a1.GameBoard, num_raccoons: int,
+                   num_cans: int, num_bins: int,
+                   fraction_smart: float = FRACTION_SMART,
+                   fraction_locked: float = FRACTION_LOCKED) -> None:
+    """Place characters on this board.
+
+    The board will have one player at the top-left corner of the board,
+    and the given number of raccoons, garbage cans and recycling bins
+    all at random, not already occupied, locations on the board.
+
+    <fraction_locked> and <fraction_smart> (FRACTION_LOCKED and
+    FRACTION_SMART by default) dictate the probability that
+    each GarbageCan is locked and
+    each Raccoon is a SmartRaccoon, respectively.
+
+    All random choices are drawn from board.rng. The locations are sampled
+    without listing every tile of the board, so this takes time and memory
+    in proportion to the number of characters, not to the size of the board.
+
+     Precondition:
+        - num_raccoons >= 0
+        - num_cans >= 0
+        - num_bins >= 0
+        - num_raccoons + num_bins + num_cans + 1 <= number of locations
+          on the board!
+        - board is initially empty
+
+    >>> b = a1.GameBoard(3, 1)
+    >>> populate_board(b,1,0,1)
+    >>> str(b) in ['PRB', 'PBR', 'PSB', 'PBS']
+    True
+    """
+    a1.Player(board, 0, 0)
+
+    # randomly pick distinct locations other than the Player's, numbered
+    # column by column, and place characters in them.
+    rng = board.rng
+    height = board.height
+    locations = iter(rng.sample(range(1, board.width * height),
+                                num_raccoons + num_cans + num_bins))
+
+    for _ in range(num_raccoons):
+        x, y = divmod(next(locations), height)
+        if rng.random() <= fraction_smart:
+            a1.SmartRaccoon(board, x, y)
+        else:
+            a1.Raccoon(board, x, y)
+
+    for _ in range(num_cans):
+        x, y = divmod(next(locations), height)
+        locked = rng.random() <= fraction_locked
+        a1.GarbageCan(board, x, y, locked)
+
+    for _ in range(num_bins):
+        x, y = divmod(next(locations), height)
+        a1.RecyclingBin(board, x, y)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    from time import perf_counter
+
+    start = perf_counter()
+    finished = []
+    for _, result in tournament(1000, 148):
+        if result.score is not None:
+            finished.append(result.score)
+    elapsed = perf_counter() - start
+    print(f'1000 games in {elapsed:.2f}s, {len(finished)} ended, '
+          f'mean score {sum(finished) / max(1, len(finished)):.2f}')
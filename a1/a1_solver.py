@@ -0,0 +1,295 @@
+"""A1: Search for the Player's best moves in Raccoon Raiders
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module searches the Player's possible moves on a board, to check that a
+level can be won and to give the Player hints.
+
+A Solver looks ahead a fixed number of ticks. In every tick the Player may
+move in one of the four directions or stay put. Every RACCOON_TURN_FREQUENCY
+ticks the raccoons take their turns, and a Raccoon (or a SmartRaccoon that
+cannot see an open garbage can) makes one of its possible moves at random.
+The value of a line of play is the score of the game if it ends within the
+ticks searched, and 0 otherwise. The raccoons' random moves are either
+assumed to be the worst possible ones for the Player ('worst' mode), or are
+averaged over ('expect' mode).
+
+The search is a depth-first search that tries a move, and then undoes it with
+GameBoard.snapshot and GameBoard.restore. Positions that are reached again
+(e.g. by staying put or by moving back and forth) are looked up in a bounded
+transposition table, keyed by the board's Zobrist hash.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable, List, NamedTuple, Optional, Tuple
+
+import a1
+
+# The number of positions a transposition table remembers by default
+TABLE_SIZE = 1 << 16
+
+# The Player's possible actions in a tick: a direction, or None to stay put
+ACTIONS = a1.DIRECTIONS + [None]
+
+
+class Solution(NamedTuple):
+    """The result of a search.
+
+    === Public Attributes ===
+    score:
+        the best value the Player can reach: the worst-case or expected score
+        of the game, counting a game that has not ended as 0
+    move:
+        the Player's first move towards that value, or None to stay put
+    ticks:
+        the number of ticks that were searched
+    """
+    score: float
+    move: Optional[Tuple[int, int]]
+    ticks: int
+
+
+class TranspositionTable:
+    """A table of search results with a bounded size. When it is full, the
+    least recently used result is evicted to make room for a new one.
+
+    === Public Attributes ===
+    capacity:
+        the number of results the table can hold
+    hits, misses:
+        the number of lookups that found and did not find a result
+    evictions:
+        the number of results evicted so far
+
+    === Sample Usage ===
+    >>> t = TranspositionTable(2)
+    >>> t.put('a', 1)
+    >>> t.put('b', 2)
+    >>> t.get('a')
+    1
+    >>> t.put('c', 3)  # evicts 'b', which was used least recently
+    >>> t.get('b') is None, t.evictions
+    (True, 1)
+    """
+    # === Private Attributes ===
+    # _entries:
+    #   the results, from least to most recently used
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: OrderedDict
+
+    def __init__(self, capacity: int = TABLE_SIZE) -> None:
+        """Initialize an empty table that holds at most <capacity> results.
+
+        Precondition:
+        capacity > 0
+        """
+        self.capacity = capacity
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of results in this table."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Return the result stored under <key>, or None if there is none."""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: Hashable, result: object) -> None:
+        """Store <result> under <key>."""
+        if key not in self._entries and len(self._entries) >= self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+
+
+class Solver:
+    """A search of the Player's moves on a copy of a board.
+
+    The copy is set up from the board's string, so its raccoons take their
+    turns in row order, like the raccoons of a board set up from a grid.
+
+    === Public Attributes ===
+    mode:
+        'worst' to assume the raccoons make the worst random moves for the
+        Player, or 'expect' to average over their random moves
+    table:
+        the transposition table of this search
+    nodes:
+        the number of positions searched so far
+
+    === Sample Usage ===
+    >>> b = a1.GameBoard(1, 1)
+    >>> b.setup_from_grid('P--\\nBRB\\n-B-')
+    >>> solver = Solver(b)
+    >>> solver.solve(3)
+    Solution(score=11, move=(1, 0), ticks=3)
+    >>> solver.table.hits > 0
+    True
+    """
+    # === Private Attributes ===
+    # _board:
+    #   the copy of the board that moves are tried on
+    # _player:
+    #   the Player on _board
+    # _raccoons:
+    #   the raccoons on _board, in the order they take their turns
+    mode: str
+    table: TranspositionTable
+    nodes: int
+    _board: a1.GameBoard
+    _player: a1.Player
+    _raccoons: List[a1.Raccoon]
+
+    def __init__(self, board: a1.GameBoard, mode: str = 'worst',
+                 table_size: int = TABLE_SIZE) -> None:
+        """Initialize a search of the moves of the Player on <board> in mode
+        <mode>, with a transposition table of <table_size> results.
+
+        Preconditions:
+        - board has a Player
+        - mode in ['worst', 'expect']
+        """
+        self.mode = mode
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0
+        self._board = type(board)(1, 1)
+        self._board.setup_from_grid(str(board))
+        self._board.turns = board.turns
+        self._raccoons = []
+        for y, row in enumerate(self._board.to_grid()):
+            for x, code in enumerate(row):
+                for c in self._board.at(x, y):
+                    if isinstance(c, a1.Player):
+                        self._player = c
+                    elif isinstance(c, a1.Raccoon):
+                        self._raccoons.append(c)
+
+    def solve(self, max_ticks: int, fastest: bool = False) -> Solution:
+        """Return the best value the Player can reach within <max_ticks>
+        ticks, and the first move towards it.
+
+        If <fastest> is True, return instead the best value and first move
+        for the smallest number of ticks in which the game can be ended
+        (for certain in 'worst' mode, or with some probability in 'expect'
+        mode), searching 1, 2, ... ticks ahead. If it cannot be ended within
+        <max_ticks> ticks, the result for <max_ticks> ticks is returned.
+
+        >>> b = a1.GameBoard(1, 1)
+        >>> b.setup_from_grid('P-B-\\n-B--\\nB-BR')
+        >>> Solver(b).solve(8)
+        Solution(score=13, move=(1, 0), ticks=8)
+        >>> Solver(b).solve(8, fastest=True)
+        Solution(score=11, move=(0, 1), ticks=3)
+        """
+        score = self._board.check_game_end()
+        if score is not None:
+            return Solution(score, None, 0)
+        for ticks in range(1 if fastest else max_ticks, max_ticks + 1):
+            value, move = self._search(ticks)
+            if value > 0:
+                break
+        return Solution(value, move, ticks)
+
+    def _search(self, ticks: int) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Return the best value the Player can reach within <ticks> ticks
+        from the current position, and the first move towards it.
+
+        Precondition:
+        ticks > 0 and the game on the board has not ended
+        """
+        board = self._board
+        key = (board.zobrist_hash(), board.turns % a1.RACCOON_TURN_FREQUENCY,
+               ticks)
+        result = self.table.get(key)
+        if result is not None:
+            return result
+        self.nodes += 1
+        best, best_move = -1, None
+        for action in ACTIONS:
+            before = board.snapshot()
+            if action is not None and not self._player.move(action):
+                continue  # the board is unchanged, as if the Player stayed
+            board.turns += 1
+            if board.turns % a1.RACCOON_TURN_FREQUENCY == 0:
+                value = self._raccoon_turns(0, ticks)
+            else:
+                value = self._after_tick(ticks)
+            board.restore(before)
+            if value > best:
+                best, best_move = value, action
+        self.table.put(key, (best, best_move))
+        return best, best_move
+
+    def _raccoon_turns(self, i: int, ticks: int) -> float:
+        """Return the value of the current tick of a search of <ticks> ticks
+        once raccoons <i> onwards have taken their turns.
+        """
+        if i == len(self._raccoons):
+            return self._after_tick(ticks)
+        raccoon = self._raccoons[i]
+        if raccoon.inside_can or raccoon.check_trapped():
+            return self._raccoon_turns(i + 1, ticks)
+        if isinstance(raccoon, a1.SmartRaccoon) and any(
+                self._board.sight_distance(raccoon.x, raccoon.y, direction)
+                for direction in a1.DIRECTIONS):
+            raccoon.take_turn()  # it heads for a garbage can it can see
+            return self._raccoon_turns(i + 1, ticks)
+        # a random move is equally likely to be any move that succeeds
+        values = []
+        for direction in a1.DIRECTIONS:
+            before = self._board.snapshot()
+            if raccoon.move(direction):
+                values.append(self._raccoon_turns(i + 1, ticks))
+            self._board.restore(before)
+        if self.mode == 'worst':
+            return min(values)
+        return sum(values) / len(values)
+
+    def _after_tick(self, ticks: int) -> float:
+        """Return the value of the position after the first of <ticks> ticks
+        has been played.
+        """
+        score = self._board.check_game_end()
+        if score is not None:
+            return score
+        elif ticks == 1:
+            return 0
+        return self._search(ticks - 1)[0]
+
+
+def hint(board: a1.GameBoard, ticks: int = 8,
+         mode: str = 'worst') -> Optional[Tuple[int, int]]:
+    """Return the Player's best move on <board>, looking <ticks> ticks
+    ahead in mode <mode> (see Solver), or None if staying put is as good as
+    any move.
+
+    >>> b = a1.GameBoard(1, 1)
+    >>> b.setup_from_grid('P--\\nBRB\\n-B-')
+    >>> hint(b)
+    (1, 0)
+    """
+    return Solver(board, mode).solve(ticks).move
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,248 @@
+"""A1: Raccoon Raiders game board for huge, mostly empty maps
+
+CSC148, Winter 2022
+
+This code is provided solely for the personal and private use of students
+taking the CSC148 course at the University of Toronto. Copying for purposes
+other than this use is expressly prohibited. All forms of distribution of this
+code, whether as given or with any changes, are expressly prohibited.
+
+=== Module Description ===
+This module contains SparseGameBoard, a GameBoard whose memory grows with the
+number of characters on it rather than with its area, so that it can be as
+big as a city (e.g. 100,000 by 100,000 tiles).
+
+The board is cut into square chunks of CHUNK_SIZE by CHUNK_SIZE tiles. The
+tile codes of a chunk are only stored (in a bytearray) while the chunk has a
+character in it, and every other tile is empty. occupied_tiles and the
+helpers that are built from it (see GameBoard.sight_distance,
+zobrist_hash and check_game_end) skip the empty chunks, and so does
+adjacent_bin_score. Use view to draw part of a board that is too big to be
+drawn whole by __str__ or to_grid.
+
+Use a1_sim.populate_board to place characters at random on a huge board; it
+does not list every tile of the board.
+"""
+
+from __future__ import annotations
+
+from random import Random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from a1 import GameBoard
+from a1_grid import iter_occupied
+from a1_index import BinClusters
+
+# The number of tiles on each side of a chunk
+CHUNK_SIZE = 16
+
+# The tile codes of a chunk that has no characters in it
+_EMPTY_CHUNK = b'-' * (CHUNK_SIZE * CHUNK_SIZE)
+
+
+class SparseGameBoard(GameBoard):
+    """A game board that only stores the chunks of tiles that have characters
+    in them.
+
+    === Sample Usage ===
+    >>> from a1 import Player, Raccoon, RecyclingBin
+    >>> b = SparseGameBoard(100_000, 100_000)
+    >>> _ = Player(b, 0, 0)
+    >>> _ = RecyclingBin(b, 70_000, 3)
+    >>> _ = Raccoon(b, 70_001, 3)
+    >>> b.chunk_count()
+    2
+    >>> b.tile_at(70_000, 3), b.tile_at(50_000, 50_000)
+    ('B', '-')
+    >>> print(b.view(69_999, 2, 4, 3))
+    ----
+    -BR-
+    ----
+    """
+    # === Private Attributes ===
+    # _grid:
+    #   the tile codes of each chunk that has characters in it, by the
+    #   chunk's (x, y) coordinates (a tile's coordinates // CHUNK_SIZE), row
+    #   by row
+    # _filled:
+    #   the number of tiles that are not empty in each chunk in _grid
+    _grid: Dict[Tuple[int, int], bytearray]
+    _filled: Dict[Tuple[int, int], int]
+
+    def __init__(self, w: int, h: int, rng: Optional[Random] = None) -> None:
+        """Initialize this board to be an empty <w> by <h> board that draws
+        randomness from <rng> (see GameBoard.__init__).
+        """
+        GameBoard.__init__(self, w, h, rng)
+        self._filled = {}
+
+    def chunk_count(self) -> int:
+        """Return the number of chunks of this board that are stored."""
+        return len(self._grid)
+
+    def _new_grid(self) -> Dict[Tuple[int, int], bytearray]:
+        """Return the chunks of an empty board: none."""
+        return {}
+
+    def _write_tile(self, x: int, y: int, code: str) -> None:
+        """Store <code> as the tile code of tile (<x>, <y>), storing its chunk
+        if it was empty and dropping it if it becomes empty.
+        """
+        key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        i = y % CHUNK_SIZE * CHUNK_SIZE + x % CHUNK_SIZE
+        chunk = self._grid.get(key)
+        if chunk is None:
+            if code == '-':
+                return
+            chunk = self._grid[key] = bytearray(_EMPTY_CHUNK)
+            self._filled[key] = 0
+        was_empty = chunk[i] == ord('-')
+        chunk[i] = ord(code)
+        if was_empty and code != '-':
+            self._filled[key] += 1
+        elif not was_empty and code == '-':
+            self._filled[key] -= 1
+            if not self._filled[key]:
+                del self._grid[key]
+                del self._filled[key]
+
+    def _load_tiles(self, tiles: bytes) -> None:
+        """Store <tiles>, the tile codes of the whole board in the format of
+        _tile_bytes, as the tile codes of this board, storing only the chunks
+        with characters in them.
+        """
+        for i, code in iter_occupied(tiles):
+            y, x = divmod(i, self.width)
+            self._write_tile(x, y, code)
+
+    def tile_at(self, x: int, y: int) -> str:
+        """Return the symbol of tile (x, y), as it would appear in to_grid().
+
+        Precondition:
+        self.on_board(x, y)
+        """
+        chunk = self._grid.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+        if chunk is None:
+            return '-'
+        return chr(chunk[y % CHUNK_SIZE * CHUNK_SIZE + x % CHUNK_SIZE])
+
+    def _rows(self) -> Iterator[bytes]:
+        """Yield the tile codes of each row of this board, as ASCII bytes.
+
+        Rows that do not cross a stored chunk are all the same bytes object.
+        """
+        chunk_rows = {}
+        for cx, cy in self._grid:
+            chunk_rows.setdefault(cy, []).append(cx)
+        empty = b'-' * self.width
+        for y in range(self.height):
+            cxs = chunk_rows.get(y // CHUNK_SIZE)
+            if not cxs:
+                yield empty
+                continue
+            row = bytearray(empty)
+            start = y % CHUNK_SIZE * CHUNK_SIZE
+            for cx in cxs:
+                chunk = self._grid[(cx, y // CHUNK_SIZE)]
+                x = cx * CHUNK_SIZE
+                size = min(CHUNK_SIZE, self.width - x)
+                row[x:x + size] = chunk[start:start + size]
+            yield bytes(row)
+
+    def _tile_bytes(self) -> bytes:
+        """Return the tile codes of the whole board as ASCII bytes, one per
+        tile, row by row and without newlines.
+        """
+        return b''.join(self._rows())
+
+    def to_grid(self) -> List[List[chr]]:
+        """Return the game state as a list of lists of chrs (letters), in the
+        format described in GameBoard.to_grid.
+
+        >>> b = SparseGameBoard(3, 2)
+        >>> b.setup_from_grid('P--\\n-RC')
+        >>> b.to_grid()
+        [['P', '-', '-'], ['-', 'R', 'C']]
+        """
+        if self._profiler is not None:
+            self._profiler.count('to_grid')
+        return [list(row.decode('ascii')) for row in self._rows()]
+
+    def iter_rows(self) -> Iterator[str]:
+        """Yield each row of the string representation of this board, as in
+        GameBoard.iter_rows.
+        """
+        for row in self._rows():
+            yield row.decode('ascii')
+
+    def __str__(self) -> str:
+        """Return a string representation of this board, in the format
+        expected by setup_from_grid.
+        """
+        return b'\n'.join(self._rows()).decode('ascii')
+
+    def view(self, x: int, y: int, width: int, height: int) -> str:
+        """Return a string representation, in the format of __str__, of the
+        <width> by <height> part of this board whose top-left tile is
+        (<x>, <y>). Tiles that are not on the board are drawn as empty.
+        """
+        rows = []
+        for row_y in range(y, y + height):
+            rows.append(''.join(
+                self.tile_at(col_x, row_y)
+                if self.on_board(col_x, row_y) else '-'
+                for col_x in range(x, x + width)))
+        return '\n'.join(rows)
+
+    def occupied_tiles(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (x, y, tile code) for every tile of this board that is not
+        empty, row by row, without looking at the empty chunks.
+
+        >>> from a1 import Player, Raccoon, RecyclingBin
+        >>> b = SparseGameBoard(40, 20)
+        >>> _ = Player(b, 39, 0)
+        >>> _ = RecyclingBin(b, 2, 17)
+        >>> _ = Raccoon(b, 1, 0)
+        >>> list(b.occupied_tiles())
+        [(1, 0, 'R'), (39, 0, 'P'), (2, 17, 'B')]
+        """
+        chunk_rows = {}
+        for cx, cy in self._grid:
+            chunk_rows.setdefault(cy, []).append(cx)
+        for cy in sorted(chunk_rows):
+            tiles = []
+            for cx in chunk_rows[cy]:
+                chunk = self._grid[(cx, cy)]
+                for i, code in iter_occupied(chunk):
+                    y, x = divmod(i, CHUNK_SIZE)
+                    tiles.append((cy * CHUNK_SIZE + y, cx * CHUNK_SIZE + x,
+                                  code))
+            tiles.sort()
+            for y, x, code in tiles:
+                yield x, y, code
+
+    def adjacent_bin_score(self) -> int:
+        """Return the size of the largest cluster of adjacent recycling bins
+        on this board, with the same result as GameBoard.adjacent_bin_score.
+
+        The first call adds the bins of the stored chunks to the clusters one
+        at a time, instead of flood filling every tile of the board.
+
+        >>> b = SparseGameBoard(1, 1)
+        >>> b.setup_from_grid('B--\\nBBB\\n--B')
+        >>> b.adjacent_bin_score()
+        5
+        """
+        clusters = self._indexes.clusters
+        if clusters is None:
+            clusters = BinClusters(self.width, self.height, bytearray())
+            for x, y, code in self.occupied_tiles():
+                if code == 'B':
+                    clusters.add(x, y)
+            self._indexes.clusters = clusters
+        return max(1, clusters.largest)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()